@@ -0,0 +1,73 @@
+import hashlib
+import hmac
+import os
+import configparser
+from cryptography.fernet import Fernet
+from .cache import TTLCache
+
+thisfolder = os.path.dirname(os.path.abspath(__file__))
+initfile = os.path.join(thisfolder, 'properties.ini')
+config = configparser.ConfigParser()
+config.read(initfile)
+
+PREFIX_MIN_LENGTH = 3
+PREFIX_MAX_LENGTH = 32
+
+fernet = None
+blind_index_key = None
+decrypted_names = TTLCache(maxsize=config.getint("SECURITY", "decrypt_cache_size", fallback=4096),
+                           ttl=config.getint("SECURITY", "decrypt_cache_ttl", fallback=600))
+
+
+def normalize(value: str) -> str:
+    return ' '.join(value.lower().split())
+
+
+def get_blind_index_key() -> bytes:
+    global blind_index_key
+    if blind_index_key is None:
+        value = config.get("SECURITY", "blind_index_key", fallback=None)
+        if not value:
+            raise RuntimeError("SECURITY.blind_index_key must be set in properties.ini")
+        blind_index_key = str.encode(value)
+    return blind_index_key
+
+
+def blind_index(value: str) -> str:
+    return hmac.new(get_blind_index_key(), normalize(value).encode(), hashlib.sha256).hexdigest()
+
+
+def blind_index_prefixes(value: str) -> set[str]:
+    value = normalize(value)
+    prefixes = set()
+    for start in [0] + [i + 1 for i, c in enumerate(value) if c == ' ']:
+        word = value[start:start + PREFIX_MAX_LENGTH]
+        for end in range(PREFIX_MIN_LENGTH, len(word) + 1):
+            prefixes.add(blind_index(word[:end]))
+    return prefixes
+
+
+def blind_index_prefix(value: str) -> str:
+    return blind_index(normalize(value)[:PREFIX_MAX_LENGTH])
+
+
+def get_fernet() -> Fernet:
+    global fernet
+    if fernet is None:
+        fernet = Fernet(str.encode(config.get("SECURITY", "key")))
+    return fernet
+
+
+def encrypt(value: str) -> str:
+    return get_fernet().encrypt(value.encode()).decode("utf-8")
+
+
+def decrypt_all(values: list[str]) -> dict[str, str]:
+    result = {}
+    for value in set(values):
+        name = decrypted_names.get(value)
+        if name is None:
+            name = get_fernet().decrypt(str.encode(value)).decode()
+            decrypted_names.set(value, name)
+        result[value] = name
+    return result
@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from pydantic import parse_obj_as
 import os
 import configparser
 
@@ -15,10 +17,30 @@ SQLALCHEMY_DATABASE_URL = "mysql+pymysql://" \
                           + config.get("DATABASE", "password") + "@" \
                           + config.get("DATABASE", "host") + "/" \
                           + config.get("DATABASE", "database")
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL,
+                       pool_size=config.getint("DATABASE", "pool_size", fallback=5),
+                       max_overflow=config.getint("DATABASE", "max_overflow", fallback=10),
+                       pool_recycle=config.getint("DATABASE", "pool_recycle", fallback=3600),
+                       pool_pre_ping=config.getboolean("DATABASE", "pool_pre_ping", fallback=True))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ASYNC_DATABASE_URL = config.get("DATABASE", "async_url", fallback=None)
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DATABASE_URL:
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    else:
+        async_engine = create_async_engine(ASYNC_DATABASE_URL,
+                                           pool_size=config.getint("DATABASE", "pool_size", fallback=5),
+                                           max_overflow=config.getint("DATABASE", "max_overflow", fallback=10),
+                                           pool_recycle=config.getint("DATABASE", "pool_recycle", fallback=3600),
+                                           pool_pre_ping=config.getboolean("DATABASE", "pool_pre_ping", fallback=True))
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,3 +48,24 @@ def get_db():
     finally:
         db.close()
 
+
+async def run_db(fn, *args, response_type=None):
+    def call(db):
+        result = fn(db, *args)
+        if result is None or response_type is None:
+            return result
+        return parse_obj_as(response_type, result)
+
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(call)
+
+    def call_sync():
+        db = SessionLocal()
+        try:
+            return call(db)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call_sync)
+
@@ -8,12 +8,16 @@ from datetime import datetime, timedelta
 from .database import get_db
 from ..services import researcher as researcher_service
 from sqlalchemy.orm import Session
+from .cache import TTLCache
 
 thisfolder = os.path.dirname(os.path.abspath(__file__))
 initfile = os.path.join(thisfolder, 'properties.ini')
 config = configparser.ConfigParser()
 config.read(initfile)
 
+validated_tokens = TTLCache(maxsize=config.getint("SECURITY", "token_cache_size", fallback=1024),
+                            ttl=config.getint("SECURITY", "token_cache_ttl", fallback=60))
+
 def get_current_researcher(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
 
     credentials_exception = HTTPException(
@@ -35,7 +39,17 @@ def get_current_researcher(token: str = Depends(oauth2_scheme), db: Session = De
     if expires is None:
         raise credentials_exception
 
-    return researcher_service.get_researcher_id_name(db, id, user) is not None
+    key = (id, user, expires)
+    valid = validated_tokens.get(key)
+    if valid is None:
+        valid = researcher_service.get_researcher_id_name(db, id, user) is not None
+        validated_tokens.set(key, valid)
+
+    return valid
+
+
+def invalidate_researcher(researcher_id: int):
+    validated_tokens.invalidate_if(lambda key: key[0] == researcher_id)
 
 
 def create_access_token(researcher):
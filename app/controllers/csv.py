@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, Response, File, UploadFile, Form, HTTPException
-from ..config.database import get_db
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Response, File, UploadFile, Form, HTTPException, Query
+from ..config.database import get_db, run_db
 from starlette.status import HTTP_204_NO_CONTENT, HTTP_404_NOT_FOUND
 from app.schemas.csv import CSVResponse, CSVCopy, CSVFilters
 from app.schemas.preproccessing import PreproccessingResponse, ICAMethod, ICAExclude
@@ -8,6 +10,7 @@ from app.schemas.feature_extraction import FeaturesResponse, FeaturePost
 from app.services import csv as csv_service
 from fastapi.responses import FileResponse
 from ..config.security import get_current_researcher
+from .page import decode_cursor, page_response
 
 
 
@@ -17,25 +20,32 @@ csv_controller = APIRouter(
 
 
 @csv_controller.get("/{experiment_id}", response_model=list[CSVResponse])
-async def get_all_csv(experiment_id: int, db = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    csvs = csv_service.get_all_csv_experiment(db, experiment_id)
-    if csvs is None:
+async def get_all_csv(experiment_id: int, type: Optional[str] = None, feature: Optional[str] = None,
+                      date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                      subject: Optional[str] = None, subject_prefix: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, db = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    page = csv_service.get_all_csv_experiment(db, experiment_id, type, feature, date_from, date_to,
+                                             subject, subject_prefix, decode_cursor(cursor), limit)
+    if page is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
+    if page == csv_service.PREFIX_TOO_SHORT:
+        raise HTTPException(status_code=400, detail=page)
 
-    return csvs
+    csvs, next_cursor, total = page
+    return page_response(csvs, CSVResponse, next_cursor, total, fields)
 
 
 @csv_controller.get("/{csv_id}/preproccessing", response_model=list[PreproccessingResponse])
-async def get_all_preproccessing(csv_id: int, db = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    preproccessings = csv_service.get_all_csv_preproccessing(db, csv_id)
+async def get_all_preproccessing(csv_id: int, exists_current_researcher = Depends(get_current_researcher)):
+    preproccessings = await run_db(csv_service.get_all_csv_preproccessing, csv_id, response_type=list[PreproccessingResponse])
     if preproccessings is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
     return preproccessings
 
 
 @csv_controller.get("/{csv_id}/feature", response_model=FeaturesResponse)
-async def get_feature(csv_id: int, db = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    return csv_service.get_csv_feature(db, csv_id)
+async def get_feature(csv_id: int, exists_current_researcher = Depends(get_current_researcher)):
+    return await run_db(csv_service.get_csv_feature, csv_id, response_type=FeaturesResponse)
 
 
 
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
 from app.schemas.experiment import ExperimentResponse, ExperimentResearchers, ExperimentSubjects, ExperimentsListResponse
 from ..config.database import get_db
 from sqlalchemy.orm import Session
@@ -6,6 +7,7 @@ from app.services import experiment as experiment_service
 from app.schemas.experiment import ExperimentPost
 from starlette.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from ..config.security import get_current_researcher
+from .page import decode_cursor, page_response
 
 experiment_controller = APIRouter(
     prefix="/experiment",
@@ -13,8 +15,9 @@ experiment_controller = APIRouter(
 
 
 @experiment_controller.get("/", response_model=list[ExperimentResponse])
-async def get_all_experiments(db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    return experiment_service.get_all_experiments(db)
+async def get_all_experiments(name: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, detail: bool = True, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    experiments, next_cursor, total = experiment_service.get_all_experiments(db, name, decode_cursor(cursor), limit, detail)
+    return page_response(experiments, ExperimentResponse if detail else ExperimentsListResponse, next_cursor, total, fields)
 
 
 @experiment_controller.get("/{experiment_id}", response_model=ExperimentResponse)
@@ -0,0 +1,37 @@
+import base64
+import binascii
+import json
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(last_id: Optional[int]) -> Optional[str]:
+    if last_id is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def page_response(items, schema, next_cursor: Optional[int], total: int, fields: Optional[str] = None) -> JSONResponse:
+    content = [jsonable_encoder(schema.from_orm(x)) for x in items]
+
+    if fields is not None:
+        keep = set(fields.split(',')) | {"id"}
+        content = [{k: v for k, v in x.items() if k in keep} for x in content]
+
+    headers = {"X-Total-Count": str(total)}
+    token = encode_cursor(next_cursor)
+    if token is not None:
+        headers["X-Next-Cursor"] = token
+
+    return JSONResponse(content=content, headers=headers)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
 from ..schemas.researcher import ResearcherResponse, ResearcherPost, ResearcherPutPassword
-from ..config.database import get_db
+from ..config.database import get_db, run_db
 from sqlalchemy.orm import Session
 from app.services import researcher as researcher_service
 from starlette.status import HTTP_204_NO_CONTENT
-from ..config.security import get_current_researcher
+from ..config.security import get_current_researcher, invalidate_researcher
+from .page import decode_cursor, page_response
 
 
 researcher_controller = APIRouter(
@@ -16,7 +18,7 @@ researcher_controller = APIRouter(
     409: {"description": "Operation forbidden"},
     201: {"description": "Created"}})
 async def create_researcher(researcher: ResearcherPost, db: Session = Depends(get_db)):
-    r = researcher_service.create_researcher(db, researcher)
+    r = await researcher_service.create_researcher(db, researcher)
     if r is None:
         raise HTTPException(status_code=409, detail="Email or user already registered")
     return r
@@ -31,14 +33,14 @@ async def login(researcher: ResearcherLogin, db: Session = Depends(get_db)):
 '''
 
 @researcher_controller.get("/", response_model=list[ResearcherResponse])
-async def get_all_researchers(exists_current_researcher = Depends(get_current_researcher), db: Session = Depends(get_db)):
-
-    return researcher_service.get_all_researcher(db)
+async def get_all_researchers(name: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, exists_current_researcher = Depends(get_current_researcher), db: Session = Depends(get_db)):
+    researchers, next_cursor, total = researcher_service.get_all_researcher(db, name, decode_cursor(cursor), limit)
+    return page_response(researchers, ResearcherResponse, next_cursor, total, fields)
 
 
 @researcher_controller.get("/{researcher_id}", response_model=ResearcherResponse)
-async def get_researcher_id(researcher_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    r = researcher_service.get_researcher_id(db, researcher_id)
+async def get_researcher_id(researcher_id: int, exists_current_researcher = Depends(get_current_researcher)):
+    r = await run_db(researcher_service.get_researcher_id, researcher_id, response_type=ResearcherResponse)
     if r is None:
         raise HTTPException(status_code=404, detail="Researcher not found")
     return r
@@ -46,11 +48,13 @@ async def get_researcher_id(researcher_id: int, db: Session = Depends(get_db), e
 
 @researcher_controller.patch("/{researcher_id}", response_model=ResearcherResponse)
 async def put_password_researcher(researcher_id: int, researcher_put: ResearcherPutPassword, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    if researcher_service.change_password(db, researcher_id, researcher_put) is None:
+    if await researcher_service.change_password(db, researcher_id, researcher_put) is None:
         raise HTTPException(status_code=404, detail="Researcher not found")
+    invalidate_researcher(researcher_id)
     return Response(status_code=HTTP_204_NO_CONTENT)
 
 
 @researcher_controller.get("/experiment/{experiment_id}", response_model=list[ResearcherResponse])
-async def get_all_researcher_not_experiment(experiment_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    return researcher_service.get_all_researcher_not_experiment(db, experiment_id)
\ No newline at end of file
+async def get_all_researcher_not_experiment(experiment_id: int, name: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    researchers, next_cursor, total = researcher_service.get_all_researcher_not_experiment(db, experiment_id, name, decode_cursor(cursor), limit)
+    return page_response(researchers, ResearcherResponse, next_cursor, total, fields)
\ No newline at end of file
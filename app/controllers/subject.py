@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from ..config.database import get_db
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from ..config.database import get_db, run_db
 from sqlalchemy.orm import Session
 from app.services import subject as subject_service
 from starlette.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from app.schemas.subject import SubjectResponse, SubjectPost
 from ..config.security import get_current_researcher
+from .page import decode_cursor, page_response
 
 subject_controller = APIRouter(
     prefix="/subject",
@@ -12,13 +14,14 @@ subject_controller = APIRouter(
 
 
 @subject_controller.get("/", response_model=list[SubjectResponse])
-async def get_all_subjects(db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    return subject_service.get_all_subjects(db)
+async def get_all_subjects(name: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    subjects, next_cursor, total = subject_service.get_all_subjects(db, name, decode_cursor(cursor), limit)
+    return page_response(subjects, SubjectResponse, next_cursor, total, fields)
 
 
 @subject_controller.get("/{subject_id}", response_model=SubjectResponse)
-async def get_subject(subject_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    subject = subject_service.get_subjects(db, subject_id)
+async def get_subject(subject_id: int, exists_current_researcher = Depends(get_current_researcher)):
+    subject = await run_db(subject_service.get_subjects, subject_id, response_type=SubjectResponse)
     if subject is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
     return subject
@@ -40,8 +43,9 @@ async def delete_subject(subject_id: int, db: Session = Depends(get_db), exists_
 
 
 @subject_controller.get("/not/{experiment_id}", response_model=list[SubjectResponse])
-async def get_subjects_not_experiment(experiment_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    subjects = subject_service.get_all_subjects_not_experiment(db, experiment_id)
-    if subjects is None:
+async def get_subjects_not_experiment(experiment_id: int, name: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    page = subject_service.get_all_subjects_not_experiment(db, experiment_id, name, decode_cursor(cursor), limit)
+    if page is None:
         raise HTTPException(status_code=404, detail="Experiment not found")
-    return subjects
\ No newline at end of file
+    subjects, next_cursor, total = page
+    return page_response(subjects, SubjectResponse, next_cursor, total, fields)
\ No newline at end of file
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, Response, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Response, HTTPException, Header, Query
 from ..config.database import get_db
-from starlette.status import HTTP_204_NO_CONTENT, HTTP_404_NOT_FOUND
+from starlette.status import HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED, HTTP_404_NOT_FOUND
 from sqlalchemy.orm import Session
-from app.schemas.training import MachineLearningPost, TrainingResponse, DeepLearningPost
+from app.schemas.training import MachineLearningPost, TrainingResponse, TrainingListResponse, DeepLearningPost, MachineLearningSearchPost, LearningCurvePost, \
+    ExtendTrainingPost
 from app.services import training as training_service
+from app.services import progress as progress_service
+from fastapi.responses import StreamingResponse
 from app.schemas.csv import CSVResponse
 from ..config.security import get_current_researcher
+from .page import decode_cursor, page_response
 
 training_controller = APIRouter(
     prefix="/training",
@@ -13,7 +18,7 @@ training_controller = APIRouter(
 
 
 @training_controller.post("/machine")
-async def create_training_machine(training_post: MachineLearningPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+def create_training_machine(training_post: MachineLearningPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
     returned = training_service.create_training_machine(db, training_post)
 
     if type(returned) == str:
@@ -22,8 +27,44 @@ async def create_training_machine(training_post: MachineLearningPost, db: Sessio
     return Response(status_code=HTTP_204_NO_CONTENT)
 
 
+@training_controller.post("/machine/search")
+def search_training_machine(training_post: MachineLearningSearchPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    returned = training_service.search_training_machine(db, training_post)
+
+    if type(returned) == str:
+        raise HTTPException(status_code=500, detail=returned)
+    elif returned is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    return returned
+
+
+@training_controller.patch("/{training_id}/extend")
+def extend_training(training_id: int, extend_post: ExtendTrainingPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    returned = training_service.extend_training(db, training_id, extend_post)
+
+    if type(returned) == str:
+        raise HTTPException(status_code=500, detail=returned)
+    elif returned is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    return Response(status_code=HTTP_204_NO_CONTENT)
+
+
+@training_controller.post("/learning_curve")
+def get_learning_curve(learning_curve_post: LearningCurvePost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    returned = training_service.get_learning_curve(db, learning_curve_post)
+
+    if type(returned) == str:
+        raise HTTPException(status_code=500, detail=returned)
+    elif returned is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    return returned
+
+
 @training_controller.post("/deep")
-async def create_training_deep(training_post: DeepLearningPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+def create_training_deep(training_post: DeepLearningPost, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
 
     returned = training_service.create_training_deep(db, training_post)
 
@@ -35,20 +76,65 @@ async def create_training_deep(training_post: DeepLearningPost, db: Session = De
     return Response(status_code=HTTP_204_NO_CONTENT)
 
 
+@training_controller.post("/{training_id}/resume")
+def resume_training_deep(training_id: int, job_id: Optional[str] = None, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+
+    returned = training_service.resume_training_deep(db, training_id, job_id)
+
+    if type(returned) == str:
+        raise HTTPException(status_code=500, detail=returned)
+    elif returned is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    return Response(status_code=HTTP_204_NO_CONTENT)
+
+
+@training_controller.get("/progress/{job_id}")
+async def training_progress(job_id: str, exists_current_researcher = Depends(get_current_researcher)):
+    return StreamingResponse(progress_service.stream(job_id), media_type="text/event-stream")
+
+
+@training_controller.get("/{training_id}/plot/{metric}")
+def plot_history(training_id: int, metric: str, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    training = training_service.get_training(db, training_id)
+    if training is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    etag = training_service.get_history_etag(training, metric)
+    if if_none_match == etag:
+        return Response(status_code=HTTP_304_NOT_MODIFIED)
+
+    img = training_service.plot_history(training, metric)
+    if img is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+
+    return Response(content=img, media_type="image/png",
+                    headers={"ETag": etag, "Cache-Control": "private, max-age=86400"})
+
+
+@training_controller.get("/{training_id}", response_model=TrainingResponse)
+async def get_training(training_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    training = training_service.get_training_detail(db, training_id)
+    if training is None:
+        return Response(status_code=HTTP_404_NOT_FOUND)
+    return training
+
+
 @training_controller.delete("/{training_id}")
 async def delete_training(training_id:int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
     training_service.delete_training(db, training_id)
     return Response(status_code=HTTP_204_NO_CONTENT)
 
-@training_controller.get("/csv/{csv_id}", response_model=list[TrainingResponse])
-async def get_trainings_csv(csv_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
-    trainings = training_service.find_all_csv(db, csv_id)
-    if trainings is None:
+@training_controller.get("/csv/{csv_id}", response_model=list[TrainingListResponse])
+async def get_trainings_csv(csv_id: int, type: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
+    page = training_service.find_all_csv(db, csv_id, type, decode_cursor(cursor), limit)
+    if page is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
-    return trainings
+    trainings, next_cursor, total = page
+    return page_response(trainings, TrainingListResponse, next_cursor, total, fields)
 
 
-@training_controller.get("/models/csv/{csv_id}")
+@training_controller.get("/models/csv/{csv_id}", response_model=list[TrainingListResponse])
 async def get_models_predictable(csv_id: int, db: Session = Depends(get_db), exists_current_researcher = Depends(get_current_researcher)):
     trainings = training_service.find_all_predictable(db, csv_id)
     if trainings is None:
@@ -60,6 +146,8 @@ async def predict(training_id: int, csv_id: int, db: Session = Depends(get_db),
     obj = training_service.predict(db, training_id, csv_id)
     if obj is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
+    elif obj == training_service.NOT_FINISHED:
+        raise HTTPException(status_code=409, detail=obj)
     elif type(obj) == str:
         raise HTTPException(status_code=500, detail=obj)
 
@@ -72,6 +160,8 @@ async def summary(training_id: int, db: Session = Depends(get_db), exists_curren
     obj = training_service.get_summary(db, training_id)
     if obj is None:
         return Response(status_code=HTTP_404_NOT_FOUND)
+    elif obj == training_service.NOT_FINISHED:
+        raise HTTPException(status_code=409, detail=obj)
     elif type(obj) == str:
         raise HTTPException(status_code=500, detail=obj)
 
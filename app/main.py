@@ -1,3 +1,8 @@
+import time
+started = time.monotonic()
+
+import resource
+import sys
 from fastapi import FastAPI, Depends, HTTPException, status
 from .controllers import researcher, experiment, subject, csv, training
 from .config.database import engine, get_db
@@ -8,6 +13,7 @@ from .services import researcher as researcher_service
 from sqlalchemy.orm import Session
 from .config.security import create_access_token
 from .schemas.researcher import ResearcherLogin, ResearcherResponseToken
+from sqlalchemy import text
 
 models.Base.metadata.create_all(bind=engine)
 
@@ -20,12 +26,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 
 @app.post("/token", response_model=ResearcherResponseToken)
 async def login(researcher_post: ResearcherLogin, db: Session = Depends(get_db)):
-    researcher = researcher_service.login(db, researcher_post.user, researcher_post.password)
+    researcher = await researcher_service.login(db, researcher_post.user, researcher_post.password)
     if researcher is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,10 +44,27 @@ async def login(researcher_post: ResearcherLogin, db: Session = Depends(get_db))
     return {"token": {"access_token": access_token, "token_type": "bearer"}, "user": researcher}
 
 
+@app.get("/ready")
+def ready(db: Session = Depends(get_db)):
+    try:
+        db.execute(text("SELECT 1"))
+        database = True
+    except Exception:
+        database = False
+
+    subsystems = {"database": database}
+    for module in ("sklearn", "tensorflow", "mne", "matplotlib", "scipy"):
+        subsystems[module] = module in sys.modules
+
+    return {"import_seconds": import_seconds,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "subsystems": subsystems}
+
+
 app.include_router(researcher.researcher_controller)
 app.include_router(experiment.experiment_controller)
 app.include_router(subject.subject_controller)
 app.include_router(csv.csv_controller)
 app.include_router(training.training_controller)
 
-
+import_seconds = time.monotonic() - started
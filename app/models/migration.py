@@ -0,0 +1,57 @@
+from sqlalchemy import inspect, UniqueConstraint
+from sqlalchemy.engine import Engine
+from app.models.models import Base
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or column.primary_key:
+                    continue
+                connection.exec_driver_sql("ALTER TABLE {} ADD COLUMN {} {}".format(
+                    preparer.format_table(table),
+                    preparer.format_column(column),
+                    column.type.compile(dialect=engine.dialect)))
+                added.append(table.name + "." + column.name)
+    return added
+
+
+def create_missing_indexes(engine: Engine):
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        existing = {i['name'] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+
+
+def create_missing_unique_constraints(engine: Engine):
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {c['name'] for c in inspector.get_unique_constraints(table.name)} | \
+                       {i['name'] for i in inspector.get_indexes(table.name)}
+            for constraint in table.constraints:
+                if not isinstance(constraint, UniqueConstraint) or constraint.name is None or \
+                        constraint.name in existing:
+                    continue
+                connection.exec_driver_sql("CREATE UNIQUE INDEX {} ON {} ({})".format(
+                    preparer.quote(constraint.name),
+                    preparer.format_table(table),
+                    ", ".join(preparer.format_column(c) for c in constraint.columns)))
+
+
+def migrate(engine: Engine) -> list[str]:
+    added = add_missing_columns(engine)
+    create_missing_indexes(engine)
+    create_missing_unique_constraints(engine)
+    return added
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Enum, Table, Boolean, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Enum, Table, Boolean, Text, DateTime, Index, \
+    UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from app.config.database import Base
 import enum
 
@@ -104,18 +105,18 @@ class NameChannel(enum.Enum):
 
 Researcher_Experiment = Table('researcher_experiment', Base.metadata,
                               Column('researcher_id', ForeignKey('researcher.id'), primary_key=True),
-                              Column('experiment_id', ForeignKey('experiment.id'), primary_key=True))
+                              Column('experiment_id', ForeignKey('experiment.id'), primary_key=True, index=True))
 
 Experiment_Subject = Table('experiment_subject', Base.metadata,
                            Column('experiment_id', ForeignKey('experiment.id'), primary_key=True),
-                           Column('subject_id', ForeignKey('subject.id'), primary_key=True))
+                           Column('subject_id', ForeignKey('subject.id'), primary_key=True, index=True))
 
 
 class Researcher(Base):
     __tablename__ = 'researcher'
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255))
+    name = Column(String(255), index=True)
     surname = Column(String(255))
     email = Column(String(255), unique=True, index=True)
     user = Column(String(255), unique=True, index=True)
@@ -136,6 +137,10 @@ class Experiment(Base):
     researcher_creator_id = Column(Integer)
     epoch_start = Column(Float)
     epoch_end = Column(Float)
+    csv_count = Column(Integer, default=0)
+    total_duration = Column(Integer, default=0)
+    training_count = Column(Integer, default=0)
+    last_modified = Column(DateTime, nullable=True)
 
     stimuli = relationship("Stimulus", cascade="save-update, delete")
 
@@ -162,7 +167,7 @@ class Stimulus(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255))
     description = Column(String(255))
-    experiment_id = Column(Integer, ForeignKey('experiment.id'))
+    experiment_id = Column(Integer, ForeignKey('experiment.id'), index=True)
 
 
 class Device(Base):
@@ -172,7 +177,7 @@ class Device(Base):
     name = Column(String(255))
     sample_rate = Column(Float)
 
-    experiment_id = Column(Integer, ForeignKey('experiment.id'))
+    experiment_id = Column(Integer, ForeignKey('experiment.id'), index=True)
     experiment = relationship("Experiment", back_populates="device")
 
     type = Column(String(50))
@@ -202,7 +207,7 @@ class Channel(Base):
     channel = Column("channel", Enum(NameChannel))
     position = Column(Integer)
 
-    eeg_headset_id = Column(Integer, ForeignKey('eeg_headset.id'))
+    eeg_headset_id = Column(Integer, ForeignKey('eeg_headset.id'), index=True)
 
 
 class Subject(Base):
@@ -227,12 +232,12 @@ class MentalCondition(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     condition = Column(String(255), index=True)
-    subject_id = Column(Integer, ForeignKey('subject.id'))
+    subject_id = Column(Integer, ForeignKey('subject.id'), index=True)
 
 
 CSV_Training = Table('csv_training', Base.metadata,
          Column('csv_id', ForeignKey('csv.id'), primary_key=True),
-         Column('training_id', ForeignKey('training.id'), primary_key=True))
+         Column('training_id', ForeignKey('training.id'), primary_key=True, index=True))
 
 
 class CSV(Base):
@@ -243,11 +248,14 @@ class CSV(Base):
     path = Column(String(255), unique=True)
     type = Column(String(255), index=True)
     subject_name = Column(String(255), index=True)
+    subject_index = Column(String(64), index=True)
     date = Column(String(255), unique=True)
+    timestamp = Column(DateTime, nullable=True)
     duraction = Column(Integer)
 
     epochs = Column(String(255))
     events = Column(Integer)
+    version = Column(Integer, default=0)
 
 
 
@@ -255,6 +263,7 @@ class CSV(Base):
 
     preproccessing_list = relationship("Preproccessing", cascade="save-update, delete")
     feature = relationship("FeatureExtraction", back_populates="csv", uselist=False, cascade="save-update, delete")
+    subject_tokens = relationship("CSVSubjectToken", cascade="save-update, delete")
 
 
 
@@ -264,6 +273,14 @@ class CSV(Base):
         secondary=CSV_Training,
         back_populates="csvs")
 
+    predictions = relationship("Prediction", cascade="save-update, delete")
+
+    __table_args__ = (
+        Index('ix_csv_experiment_id_id', 'experiment_id', 'id'),
+        Index('ix_csv_experiment_id_type', 'experiment_id', 'type'),
+        Index('ix_csv_experiment_id_timestamp', 'experiment_id', 'timestamp'),
+    )
+
 
 class Preproccessing(Base):
     __tablename__ = 'preproccessing'
@@ -272,7 +289,7 @@ class Preproccessing(Base):
     position = Column(Integer, index=True)
     preproccessing = Column(String(255))
     description = Column(String(255))
-    csv_id = Column(Integer, ForeignKey('csv.id'))
+    csv_id = Column(Integer, ForeignKey('csv.id'), index=True)
 
 
 class FeatureExtraction(Base):
@@ -280,23 +297,43 @@ class FeatureExtraction(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     feature = Column(String(255))
-    csv_id = Column(Integer, ForeignKey('csv.id'), nullable=True)
+    csv_id = Column(Integer, ForeignKey('csv.id'), nullable=True, index=True)
     csv = relationship("CSV", back_populates="feature")
 
 
+class CSVSubjectToken(Base):
+    __tablename__ = 'csv_subject_token'
+
+    id = Column(Integer, primary_key=True)
+    csv_id = Column(Integer, ForeignKey('csv.id'), index=True)
+    token = Column(String(64), index=True)
+
+
 class Training(Base):
     __tablename__ = 'training'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255))
-    description = Column(Text())
+    description = deferred(Column(Text()))
     feature = Column(String(50))
     path = Column(String(255), unique=True)
-    experiment_id = Column(Integer, ForeignKey('experiment.id'))
+    experiment_id = Column(Integer, ForeignKey('experiment.id'), index=True)
     type = Column(String(50))
-    validation = Column(Text())
+    validation = deferred(Column(Text()))
     path_accuracy = Column(String(255), nullable=True)
     path_loss = Column(String(255), unique=True, nullable=True)
+    testing_data = Column(Float, nullable=True)
+    incremental = Column(Boolean, nullable=True)
+    timestamp = Column(DateTime, nullable=True)
+    history = deferred(Column(Text(), nullable=True))
+    params = deferred(Column(Text(), nullable=True))
+    status = Column(String(50), nullable=True)
+    checkpoint = Column(String(255), nullable=True)
+    epoch = Column(Integer, nullable=True)
+    stopped_epoch = Column(Integer, nullable=True)
+    summary = deferred(Column(Text(), nullable=True))
+    trainable_params = Column(Integer, nullable=True)
+    non_trainable_params = Column(Integer, nullable=True)
 
 
 
@@ -304,3 +341,20 @@ class Training(Base):
         "CSV",
         secondary=CSV_Training,
         back_populates="trainings")
+
+    predictions = relationship("Prediction", cascade="save-update, delete")
+
+
+class Prediction(Base):
+    __tablename__ = 'prediction'
+
+    id = Column(Integer, primary_key=True, index=True)
+    training_id = Column(Integer, ForeignKey('training.id'))
+    csv_id = Column(Integer, ForeignKey('csv.id'), index=True)
+    csv_version = Column(Integer)
+    text = Column(Text())
+    n_jumps = Column(Integer)
+
+    __table_args__ = (
+        UniqueConstraint('training_id', 'csv_id', name='uq_prediction_training_id_csv_id'),
+    )
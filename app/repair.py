@@ -0,0 +1,36 @@
+from app.config.database import engine, SessionLocal
+from app.models import models
+from app.models.migration import migrate
+from app.services import csv as csv_service
+from app.services import experiment as experiment_service
+from app.services import training as training_service
+
+
+def main():
+    models.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        removed = training_service.delete_duplicate_predictions(db)
+        print("Duplicate predictions removed: " + str(removed))
+
+        added = migrate(engine)
+        print("Columns added: " + (", ".join(added) if added else "none"))
+
+        dated = csv_service.backfill_timestamps(db)
+        print("CSV timestamps backfilled: " + str(dated))
+
+        dated = training_service.backfill_timestamps(db)
+        print("Training timestamps backfilled: " + str(dated))
+
+        repaired = experiment_service.repair_counters(db)
+        print("Experiment counters recomputed: " + str(repaired))
+
+        indexed = csv_service.index_subject_names(db)
+        print("Subject names indexed: " + str(indexed))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from typing import Optional
+from datetime import datetime
 from app.models import models
+from app.repositories.page import paginate
 
 
 def find_by_id(db: Session, csv_id: int) -> models.CSV:
@@ -13,6 +16,43 @@ def find_by_path(db: Session, path: str) -> bool:
 def find_all_by_experiment(db: Session, experiment_id: int):
     return db.query(models.CSV).filter(models.CSV.experiment_id == experiment_id)
 
+
+def find_all_not_indexed(db: Session) -> list[models.CSV]:
+    return db.query(models.CSV).filter(models.CSV.subject_index.is_(None)).all()
+
+
+def find_all_without_timestamp(db: Session) -> list[models.CSV]:
+    return db.query(models.CSV).filter(models.CSV.timestamp.is_(None)).all()
+
+
+def find_page_by_experiment(db: Session, experiment_id: int, type: Optional[str], feature: Optional[str],
+                            date_from: Optional[datetime], date_to: Optional[datetime],
+                            subject_index: Optional[str], subject_token: Optional[str],
+                            cursor: Optional[int], limit: int):
+    query = db.query(models.CSV).filter(models.CSV.experiment_id == experiment_id)
+    if type is not None:
+        query = query.filter(models.CSV.type == type)
+    if feature is not None:
+        query = query.join(models.CSV.feature).filter(models.FeatureExtraction.feature == feature)
+    if date_from is not None:
+        query = query.filter(models.CSV.timestamp >= date_from)
+    if date_to is not None:
+        query = query.filter(models.CSV.timestamp <= date_to)
+    if subject_index is not None:
+        query = query.filter(models.CSV.subject_index == subject_index)
+    if subject_token is not None:
+        query = query.filter(models.CSV.subject_tokens.any(models.CSVSubjectToken.token == subject_token))
+
+    return paginate(query, models.CSV.id, cursor, limit)
+
+
+def find_all_same_feature(db: Session, experiment_id: int, feature: str, csv_id: int) -> list[models.CSV]:
+    return db.query(models.CSV).join(models.CSV.feature)\
+        .options(selectinload(models.CSV.feature))\
+        .filter(models.CSV.experiment_id == experiment_id,
+                models.FeatureExtraction.feature == feature,
+                models.CSV.id != csv_id).all()
+
 def save(db: Session, csv: models.CSV) -> models.CSV:
     db.add(csv)
     db.commit()
@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 from app.models import models
 from app.repositories import researcher as researcher_crud
+from app.repositories.page import paginate
 
 
 def find_by_id(db: Session, experiment_id: int) -> Optional[models.Experiment]:
@@ -9,6 +12,28 @@ def find_by_id(db: Session, experiment_id: int) -> Optional[models.Experiment]:
     return e
 
 
+def detail_options() -> list:
+    return [selectinload(models.Experiment.researchers),
+            selectinload(models.Experiment.stimuli),
+            selectinload(models.Experiment.device.of_type(models.EEGHeadset)).selectinload(models.EEGHeadset.channels),
+            selectinload(models.Experiment.subjects).selectinload(models.Subject.mental_conditions),
+            selectinload(models.Experiment.csvs)]
+
+
+def find_by_id_detail(db: Session, experiment_id: int) -> Optional[models.Experiment]:
+    return db.query(models.Experiment).options(*detail_options()).filter(models.Experiment.id == experiment_id).first()
+
+
+def find_page(db: Session, name: Optional[str], cursor: Optional[int], limit: int, detail: bool = True):
+    query = db.query(models.Experiment)
+    if detail:
+        query = query.options(*detail_options())
+    if name is not None:
+        query = query.filter(models.Experiment.name.startswith(name, autoescape=True))
+
+    return paginate(query, models.Experiment.id, cursor, limit)
+
+
 def save(db: Session, experiment: models.Experiment) -> models.Experiment:
     db.add(experiment)
     db.commit()
@@ -30,3 +55,35 @@ def delete(db: Session, experiment: models.Experiment):
     db.commit()
 
 
+def update_counters(db: Session, experiment_id: int, csvs: int = 0, duration: int = 0, trainings: int = 0):
+    db.query(models.Experiment).filter(models.Experiment.id == experiment_id).update({
+        models.Experiment.csv_count: func.coalesce(models.Experiment.csv_count, 0) + csvs,
+        models.Experiment.total_duration: func.coalesce(models.Experiment.total_duration, 0) + duration,
+        models.Experiment.training_count: func.coalesce(models.Experiment.training_count, 0) + trainings,
+        models.Experiment.last_modified: datetime.now()}, synchronize_session=False)
+
+
+def latest(a, b):
+    return case((a.is_(None), b), (b.is_(None), a), (a > b, a), else_=b)
+
+
+def recompute_counters(db: Session) -> int:
+    csv_count = select(func.count(models.CSV.id)) \
+        .where(models.CSV.experiment_id == models.Experiment.id).scalar_subquery()
+    total_duration = select(func.coalesce(func.sum(models.CSV.duraction), 0)) \
+        .where(models.CSV.experiment_id == models.Experiment.id).scalar_subquery()
+    training_count = select(func.count(models.Training.id)) \
+        .where(models.Training.experiment_id == models.Experiment.id).scalar_subquery()
+    last_csv = select(func.max(models.CSV.timestamp)) \
+        .where(models.CSV.experiment_id == models.Experiment.id).scalar_subquery()
+    last_training = select(func.max(models.Training.timestamp)) \
+        .where(models.Training.experiment_id == models.Experiment.id).scalar_subquery()
+
+    updated = db.query(models.Experiment).update({
+        models.Experiment.csv_count: csv_count,
+        models.Experiment.total_duration: total_duration,
+        models.Experiment.training_count: training_count,
+        models.Experiment.last_modified: latest(latest(last_csv, last_training), models.Experiment.last_modified)},
+        synchronize_session=False)
+    db.commit()
+    return updated
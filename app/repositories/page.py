@@ -0,0 +1,17 @@
+from typing import Optional
+
+
+def paginate(query, id_column, cursor: Optional[int], limit: int):
+    total = query.order_by(None).count()
+
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+
+    items = query.order_by(id_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+
+    return items, next_cursor, total
@@ -0,0 +1,32 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models import models
+
+
+def find_by_training_csv(db: Session, training_id: int, csv_id: int) -> Optional[models.Prediction]:
+    return db.query(models.Prediction).filter(models.Prediction.training_id == training_id,
+                                              models.Prediction.csv_id == csv_id).first()
+
+
+def save(db: Session, prediction: models.Prediction) -> models.Prediction:
+    db.add(prediction)
+    db.commit()
+    db.refresh(prediction)
+    return prediction
+
+
+def delete_by_csv(db: Session, csv_id: int):
+    db.query(models.Prediction).filter(models.Prediction.csv_id == csv_id).delete(synchronize_session=False)
+
+
+def delete_by_training(db: Session, training_id: int):
+    db.query(models.Prediction).filter(models.Prediction.training_id == training_id).delete(synchronize_session=False)
+
+
+def delete_duplicates(db: Session) -> int:
+    keep = [x for x, in db.query(func.min(models.Prediction.id))
+            .group_by(models.Prediction.training_id, models.Prediction.csv_id).all()]
+    deleted = db.query(models.Prediction).filter(models.Prediction.id.notin_(keep)).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,5 +1,8 @@
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.models import models
+from app.repositories.page import paginate
 
 
 def find_by_id(db: Session, researcher_id: int) -> models.Researcher:
@@ -28,6 +31,25 @@ def find_all(db: Session) -> list[models.Researcher]:
     return db.query(models.Researcher).all()
 
 
+def find_all_not_experiment(db: Session, experiment_id: int, name: Optional[str],
+                            cursor: Optional[int], limit: int):
+    query = db.query(models.Researcher).filter(~exists().where(
+        models.Researcher_Experiment.c.researcher_id == models.Researcher.id,
+        models.Researcher_Experiment.c.experiment_id == experiment_id))
+
+    if name is not None:
+        query = query.filter(models.Researcher.name.startswith(name, autoescape=True))
+    return paginate(query, models.Researcher.id, cursor, limit)
+
+
+def find_page(db: Session, name: Optional[str], cursor: Optional[int], limit: int):
+    query = db.query(models.Researcher)
+    if name is not None:
+        query = query.filter(models.Researcher.name.startswith(name, autoescape=True))
+
+    return paginate(query, models.Researcher.id, cursor, limit)
+
+
 def exists_by_user_email(db: Session, email: str, user: str) -> bool:
     return db.query(models.Researcher).filter(
         models.Researcher.email == email
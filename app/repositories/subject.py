@@ -1,5 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, selectinload
+from typing import Optional
 from app.models import models
+from app.repositories.page import paginate
 
 
 def find_by_id(db: Session, subject_id: int) -> models.Subject:
@@ -15,7 +18,26 @@ def save(db: Session, subject: models.Subject) -> models.Subject:
 
 
 def find_all(db: Session) -> list[models.Subject]:
-    return db.query(models.Subject).all()
+    return db.query(models.Subject).options(selectinload(models.Subject.mental_conditions)).all()
+
+
+def find_all_not_experiment(db: Session, experiment_id: int, name: Optional[str],
+                            cursor: Optional[int], limit: int):
+    query = db.query(models.Subject).options(selectinload(models.Subject.mental_conditions)).filter(~exists().where(
+        models.Experiment_Subject.c.subject_id == models.Subject.id,
+        models.Experiment_Subject.c.experiment_id == experiment_id))
+
+    if name is not None:
+        query = query.filter(models.Subject.name.startswith(name, autoescape=True))
+    return paginate(query, models.Subject.id, cursor, limit)
+
+
+def find_page(db: Session, name: Optional[str], cursor: Optional[int], limit: int):
+    query = db.query(models.Subject).options(selectinload(models.Subject.mental_conditions))
+    if name is not None:
+        query = query.filter(models.Subject.name.startswith(name, autoescape=True))
+
+    return paginate(query, models.Subject.id, cursor, limit)
 
 
 def delete(db: Session, subject: models.Subject):
@@ -1,11 +1,39 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, undefer
+from typing import Optional
 from app.models import models
+from app.repositories.page import paginate
 
 
 def find_by_id(db: Session, training_id: int) -> models.Training:
     return db.query(models.Training).filter(models.Training.id == training_id).first()
 
 
+def find_by_id_detail(db: Session, training_id: int) -> Optional[models.Training]:
+    return db.query(models.Training).options(undefer(models.Training.description),
+                                             undefer(models.Training.validation)) \
+        .filter(models.Training.id == training_id).first()
+
+
+def find_page_by_csv(db: Session, csv_id: int, type: Optional[str], cursor: Optional[int], limit: int):
+    query = db.query(models.Training).filter(models.Training.csvs.any(models.CSV.id == csv_id))
+    if type is not None:
+        query = query.filter(models.Training.type == type)
+
+    return paginate(query, models.Training.id, cursor, limit)
+
+
+def find_all_predictable(db: Session, experiment_id: int, feature: str, csv_id: int) -> list[models.Training]:
+    return db.query(models.Training).filter(models.Training.experiment_id == experiment_id,
+                                            models.Training.feature == feature,
+                                            or_(models.Training.status.is_(None), models.Training.status == 'finished'),
+                                            ~models.Training.csvs.any(models.CSV.id == csv_id)).all()
+
+
+def find_all_without_timestamp(db: Session) -> list[models.Training]:
+    return db.query(models.Training).filter(models.Training.timestamp.is_(None)).all()
+
+
 def save(db: Session, training: models.Training) -> models.Training:
 
     db.add(training)
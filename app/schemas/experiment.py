@@ -4,7 +4,8 @@ from app.schemas.stimulus import StimulusPost, StimulusResponse
 from app.schemas.device import EEGHeadsetResponse, DeviceResponse, EEGHeadsetPost
 from app.schemas.subject import SubjectResponse
 from app.schemas.csv import CSVResponse
-from typing import Union
+from typing import Union, Optional
+from datetime import datetime
 from decimal import Decimal
 
 
@@ -37,6 +38,10 @@ class ExperimentsListResponse(BaseModel):
     id: int
     name: str
     description: str
+    csv_count: Optional[int]
+    total_duration: Optional[int]
+    training_count: Optional[int]
+    last_modified: Optional[datetime]
 
     class Config:
         orm_mode = True
@@ -54,6 +59,10 @@ class ExperimentResponse(BaseModel):
     csvs: list[CSVResponse] = []
     epoch_start: float
     epoch_end: float
+    csv_count: Optional[int]
+    total_duration: Optional[int]
+    training_count: Optional[int]
+    last_modified: Optional[datetime]
 
     class Config:
         orm_mode = True
@@ -1,15 +1,19 @@
-from pydantic import BaseModel
-from typing import Union, Optional
+from pydantic import BaseModel, Field, validator
+from typing import Union, Optional, Literal
 
 
 
 
 class KNN(BaseModel):
     n_neighbors: int
+    index: Literal['auto', 'ball_tree', 'kd_tree', 'brute'] = 'auto'
+    leaf_size: int = 30
+    n_jobs: int = -1
 
 
 class RandomForest(BaseModel):
     n_estimators: int
+    n_jobs: int = -1
 
 
 
@@ -17,7 +21,46 @@ class SVM(BaseModel):
     kernel: str
 
 
-algorithm_machine = Union[KNN, RandomForest, SVM]
+class SGD(BaseModel):
+    loss: str
+    alpha: float = 0.0001
+
+
+class NaiveBayes(BaseModel):
+    var_smoothing: float
+
+
+class LinearSVM(BaseModel):
+    c: float
+
+
+class ApproximateSVM(BaseModel):
+    approximation: Literal['nystroem', 'rbf_sampler']
+    n_components: int = 100
+    gamma: float = Field(1.0, gt=0, description="RBF kernel coefficient, used by both approximations")
+
+
+class GradientBoosting(BaseModel):
+    max_iter: int
+    learning_rate: float = 0.1
+
+
+algorithm_machine = Union[KNN, RandomForest, SVM, SGD, NaiveBayes, LinearSVM, ApproximateSVM, GradientBoosting]
+
+
+class KNNSearch(BaseModel):
+    n_neighbors: list[int]
+
+
+class RandomForestSearch(BaseModel):
+    n_estimators: list[int]
+
+
+class SVMSearch(BaseModel):
+    kernel: list[str]
+
+
+algorithm_machine_search = Union[KNNSearch, RandomForestSearch, SVMSearch]
 
 class LayerPost(BaseModel):
     num_neurons: int
@@ -31,6 +74,11 @@ class LayerFirstPost(LayerPost):
 
 layer = Union[LayerFirstPost, LayerPost]
 
+class EarlyStoppingPost(BaseModel):
+    patience: int = 5
+    validation_data: float = 10
+
+
 class DeepLearningPost(BaseModel):
     csvs: list[int]
     name: str
@@ -44,6 +92,27 @@ class DeepLearningPost(BaseModel):
     layers: list[layer]
     loss: str
     epochs: int
+    chunk_size: Optional[int] = None
+    job_id: Optional[str] = None
+    early_stopping: Optional[EarlyStoppingPost] = None
+    checkpoint_every: Optional[int] = None
+
+
+class PipelinePost(BaseModel):
+    scale: bool = True
+    pca_components: Optional[float] = Field(None, gt=0, description="Number of components if >= 1, "
+                                                                "explained variance ratio if < 1")
+
+    @validator('pca_components')
+    def check_pca_components(cls, value):
+        if value is not None and value >= 1 and not value.is_integer():
+            raise ValueError("pca_components must be an integer when it is 1 or greater")
+        return value
+
+
+class CrossValidationPost(BaseModel):
+    type: Literal['stratified', 'group']
+    folds: int = Field(5, ge=2)
 
 
 class MachineLearningPost(BaseModel):
@@ -53,6 +122,52 @@ class MachineLearningPost(BaseModel):
     training_data: float
     algorithm: algorithm_machine
     exp_id: int
+    cross_validation: Optional[CrossValidationPost] = None
+    chunk_size: Optional[int] = None
+    pipeline: Optional[PipelinePost] = None
+
+
+class MachineLearningSearchPost(BaseModel):
+    csvs: list[int]
+    name: str
+    testing_data: float
+    training_data: float
+    algorithms: list[algorithm_machine_search]
+    search: Literal['grid', 'random']
+    n_iter: int = 10
+    folds: int = 5
+    time_budget: Optional[float] = None
+    pipeline: Optional[PipelinePost] = None
+    exp_id: int
+
+class ExtendTrainingPost(BaseModel):
+    csvs: list[int]
+    chunk_size: int = 10000
+
+
+class LearningCurvePost(BaseModel):
+    csvs: list[int]
+    exp_id: int
+    algorithm: algorithm_machine
+    train_sizes: list[float] = [0.1, 0.325, 0.55, 0.775, 1.0]
+    folds: int = 5
+    pipeline: Optional[PipelinePost] = None
+
+
+class TrainingListResponse(BaseModel):
+    id: int
+    name: str
+    type: str
+    feature: Optional[str]
+    status: Optional[str]
+    epoch: Optional[int]
+    stopped_epoch: Optional[int]
+    trainable_params: Optional[int]
+    non_trainable_params: Optional[int]
+
+    class Config:
+        orm_mode = True
+
 
 class TrainingResponse(BaseModel):
     id: int
@@ -60,8 +175,11 @@ class TrainingResponse(BaseModel):
     description: str
     type: str
     validation: str
-    path_accuracy: Optional[str]
-    path_loss: Optional[str]
+    status: Optional[str]
+    epoch: Optional[int]
+    stopped_epoch: Optional[int]
+    trainable_params: Optional[int]
+    non_trainable_params: Optional[int]
 
     class Config:
         orm_mode = True
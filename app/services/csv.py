@@ -8,22 +8,20 @@ from app.repositories import experiment as experiment_crud
 from app.repositories import subject as subject_crud
 from datetime import datetime, timedelta
 import os
-from app.schemas.csv import CSVCopy, CSVFilters
+from app.schemas.csv import CSVCopy, CSVFilters, CSVResponse
 from app.schemas.preproccessing import ICAMethod, ICAExclude
 from app.schemas.feature_extraction import FeaturePost
 import json
 import numpy as np
 import pandas as pd
-from mne.io import RawArray
-import mne
 import base64
 import app.repositories.training as training_crud
+import app.repositories.prediction as prediction_crud
+from app.services import training as training_service
 from app.schemas.epoch import EpochPlot, EpochAverage, EpochCompare, EpochActivity, EpochPSD
-import matplotlib.pyplot as plt
 import math
 import shutil
-from scipy.integrate import simps
-from cryptography.fernet import Fernet
+from app.config import crypto
 import os
 import configparser
 
@@ -55,19 +53,58 @@ def get_csv_feature(db: Session, csv_id: int) -> Optional[models.FeatureExtracti
     return csv.feature
 
 
-def get_all_csv_experiment(db: Session, experiment_id: int) -> Optional[list[models.Experiment]]:
-    e = experiment_crud.find_by_id(db, experiment_id)
-    fernet = Fernet(str.encode(config.get("SECURITY", "key")))
+def to_responses(csvs: list[models.CSV]) -> list[CSVResponse]:
+    names = crypto.decrypt_all([csv.subject_name for csv in csvs])
+    return [CSVResponse.from_orm(csv).copy(update={"subject_name": names[csv.subject_name]}) for csv in csvs]
 
-    for csv in e.csvs:
-        csv.subject_name = fernet.decrypt(str.encode(csv.subject_name)).decode()
-    if e is None:
+
+def index_subject_names(db: Session) -> int:
+    csvs = csv_crud.find_all_not_indexed(db)
+    names = crypto.decrypt_all([csv.subject_name for csv in csvs])
+
+    for csv in csvs:
+        name = names[csv.subject_name]
+        csv.subject_index = crypto.blind_index(name)
+        csv.subject_tokens = [models.CSVSubjectToken(token=x) for x in crypto.blind_index_prefixes(name)]
+    db.commit()
+    return len(csvs)
+
+
+def backfill_timestamps(db: Session) -> int:
+    count = 0
+    for csv in csv_crud.find_all_without_timestamp(db):
+        try:
+            csv.timestamp = datetime.strptime(csv.date, "%d-%m-%Y-%H-%M-%S")
+            count += 1
+        except (TypeError, ValueError):
+            pass
+    db.commit()
+    return count
+
+
+PREFIX_TOO_SHORT = "Subject prefix must have at least " + str(crypto.PREFIX_MIN_LENGTH) + " characters"
+
+
+def get_all_csv_experiment(db: Session, experiment_id: int, type: Optional[str] = None, feature: Optional[str] = None,
+                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                           subject: Optional[str] = None, subject_prefix: Optional[str] = None,
+                           cursor: Optional[int] = None, limit: int = 100):
+    if not experiment_crud.exists_by_id(db, experiment_id):
         return None
-    return e.csvs
+    if subject_prefix is not None and len(crypto.normalize(subject_prefix)) < crypto.PREFIX_MIN_LENGTH:
+        return PREFIX_TOO_SHORT
+
+    subject_index = None if subject is None else crypto.blind_index(subject)
+    subject_token = None if subject_prefix is None else crypto.blind_index_prefix(subject_prefix)
+
+    csvs, next_cursor, total = csv_crud.find_page_by_experiment(db, experiment_id, type, feature, date_from, date_to,
+                                                                subject_index, subject_token, cursor, limit)
+    return to_responses(csvs), next_cursor, total
 
 
 def create_csv(db: Session, name: str, subject_id: int, experiment_id: int,
                time_correction: float, files: list[UploadFile]) -> Optional[models.CSV]:
+    import mne
     exp = experiment_crud.find_by_id(db, experiment_id)
     subject = subject_crud.find_by_id(db, subject_id)
     if exp is None or subject is None:
@@ -112,21 +149,24 @@ def create_csv(db: Session, name: str, subject_id: int, experiment_id: int,
     str_epoch = str_epoch[1:]
     str_epoch = str_epoch[:-1]
 
-    fernet = Fernet(str.encode(config.get("SECURITY", "key")))
-    subject_encrypted = fernet.encrypt(str(subject.name + ' ' + subject.surname).encode())
+    subject_name = subject.name + ' ' + subject.surname
 
     db_csv = models.CSV(name=name,
-                        subject_name=subject_encrypted.decode("utf-8"),
+                        subject_name=crypto.encrypt(subject_name),
+                        subject_index=crypto.blind_index(subject_name),
+                        subject_tokens=[models.CSVSubjectToken(token=x) for x in crypto.blind_index_prefixes(subject_name)],
                         type='original',
                         experiment_id=experiment_id,
                         path=name_file,
                         date=name_file[12:31],
+                        timestamp=datetime.now(),
                         duraction=int(df.shape[0]/exp.device.sample_rate),
                         events=len(events),
                         epochs=str_epoch)
 
     subject_crud.save(db, subject)
 
+    experiment_crud.update_counters(db, experiment_id, csvs=1, duration=db_csv.duraction)
     return csv_crud.save(db, db_csv)
 
 
@@ -145,6 +185,14 @@ def delete_csv(db: Session, csv_id: int) -> bool:
             os.remove(training.path)
         except:
             pass
+        try:
+            os.remove(training_service.generate_name_weights(training.path))
+        except:
+            pass
+        try:
+            os.remove(training.checkpoint)
+        except:
+            pass
 
 
         if training.type == 'Deep Learning':
@@ -158,8 +206,10 @@ def delete_csv(db: Session, csv_id: int) -> bool:
                 pass
 
         if len(training.csvs) == 1:
+            experiment_crud.update_counters(db, training.experiment_id, trainings=-1)
             training_crud.delete(db, training)
 
+    experiment_crud.update_counters(db, csv.experiment_id, csvs=-1, duration=-(csv.duraction or 0))
     csv_crud.delete(db, csv)
     return True
 
@@ -177,10 +227,13 @@ def csv_copy(db: Session, csv_id: int, csv_copy: CSVCopy) -> Optional[models.CSV
 
         db_csv = models.CSV(name=csv_copy.name,
                             subject_name=csv_original.subject_name,
+                            subject_index=csv_original.subject_index,
+                            subject_tokens=[models.CSVSubjectToken(token=x.token) for x in csv_original.subject_tokens],
                             type='copied',
                             experiment_id=csv_original.experiment_id,
                             path=name_file,
                             date=name_file[12:31],
+                            timestamp=datetime.now(),
                             duraction=csv_original.duraction,
                             epochs=csv_original.epochs,
                             events=csv_original.events)
@@ -192,6 +245,7 @@ def csv_copy(db: Session, csv_id: int, csv_copy: CSVCopy) -> Optional[models.CSV
                 csv_id=db_csv.id,
                 description=x.description)
             db_csv.preproccessing_list.append(db_preproccessing)
+        experiment_crud.update_counters(db, db_csv.experiment_id, csvs=1, duration=db_csv.duraction or 0)
         return csv_crud.save(db, db_csv)
 
     except:
@@ -234,6 +288,7 @@ def apply_preproccessing(db: Session, csv_filters: CSVFilters):
                         pass
                     csv.path = generate_name_csv(db)
                     csv.date = csv.path[12:31]
+                    csv.timestamp = datetime.now()
                     csv.type = 'prep'
 
                     ch_names = []
@@ -242,7 +297,10 @@ def apply_preproccessing(db: Session, csv_filters: CSVFilters):
                     data = convert_to_df(rawdata, ch_names)
 
                     data.to_csv(csv.path, index=False)
-                    csv.duraction = data.shape[0]/exp.device.sample_rate
+                    duraction = int(data.shape[0]/exp.device.sample_rate)
+                    experiment_crud.update_counters(db, csv.experiment_id, duration=duraction - (csv.duraction or 0))
+                    csv.duraction = duraction
+                    new_version(db, csv)
                     csv_crud.save(db, csv)
                     text += csv.name + ": Preproccessing applied\n"
 
@@ -254,7 +312,14 @@ def apply_preproccessing(db: Session, csv_filters: CSVFilters):
 
     return text
 
+
+def new_version(db: Session, csv: models.CSV):
+    csv.version = (csv.version or 0) + 1
+    prediction_crud.delete_by_csv(db, csv.id)
+
 def load_raw(df, experiment):
+    import mne
+    from mne.io import RawArray
 
     if experiment.device.type == 'eeg_headset':
 
@@ -356,8 +421,10 @@ def apply_feature(db: Session, feature_post: FeaturePost):
             os.remove(csv.path)
             csv.path = generate_name_csv(db)
             csv.date = csv.path[12:31]
+            csv.timestamp = datetime.now()
             new_df.to_csv(name_file, index=False)
 
+            experiment_crud.update_counters(db, csv.experiment_id, duration=-(csv.duraction or 0))
             csv.duraction = 0
 
             if csv.type == 'prep':
@@ -365,6 +432,7 @@ def apply_feature(db: Session, feature_post: FeaturePost):
             else:
                 csv.type = 'feature'
 
+            new_version(db, csv)
             csv_crud.save(db, csv)
             text += csv.name + ": Extraction applied\n"
 
@@ -377,7 +445,7 @@ def generate_name_csv(db: Session):
     now = datetime.now()
     name_file = "csvs/record_{}.csv".format(now.strftime("%d-%m-%Y-%H-%M-%S"))
     while csv_crud.find_by_path(db, name_file):
-        now = datetime.now() + timedelta(seconds=1)
+        now = now + timedelta(seconds=1)
         name_file = "csvs/record_{}.csv".format(now.strftime("%d-%m-%Y-%H-%M-%S"))
 
     return name_file
@@ -504,6 +572,7 @@ def convert_to_df(rawdata, ch_names) -> pd.DataFrame:
 
 
 def plot_properties_ica(db: Session, csv_id, ica_method: ICAMethod):
+    import mne
     csv = csv_crud.find_by_id(db, csv_id)
 
     if csv is None:
@@ -543,6 +612,7 @@ def plot_properties_ica(db: Session, csv_id, ica_method: ICAMethod):
 
 
 def plot_components_ica(db: Session, csv_id: int, ica_method: ICAMethod):
+    import mne
     csv = csv_crud.find_by_id(db, csv_id)
 
     if csv is None:
@@ -577,6 +647,7 @@ def plot_components_ica(db: Session, csv_id: int, ica_method: ICAMethod):
 
 
 def components_exclude_ica(db: Session, csv_id: int, arg: ICAExclude):
+    import mne
     csv = csv_crud.find_by_id(db, csv_id)
 
     if csv is None:
@@ -626,11 +697,15 @@ def components_exclude_ica(db: Session, csv_id: int, arg: ICAExclude):
     os.remove(csv.path)
     csv.path = generate_name_csv(db)
     csv.date = csv.path[12:31]
+    csv.timestamp = datetime.now()
     csv.type = 'prep'
-    csv.duraction = data.shape[0]/exp.device.sample_rate
+    duraction = int(data.shape[0]/exp.device.sample_rate)
+    experiment_crud.update_counters(db, csv.experiment_id, duration=duraction - (csv.duraction or 0))
+    csv.duraction = duraction
 
     data.to_csv(csv.path, index=False)
 
+    new_version(db, csv)
     csv_crud.save(db, csv)
 
 
@@ -638,14 +713,10 @@ def get_csvs_same_features(db: Session, csv_id: int)-> Optional[list[models.CSV]
     csv = csv_crud.find_by_id(db, csv_id)
     if csv is None:
         return None
-    all_csv = csv_crud.find_all_by_experiment(db, csv.experiment_id)
-    returned = []
+    if csv.feature is None:
+        return []
 
-    for c in all_csv:
-        if c.id != csv.id and c.feature is not None and c.feature.feature == csv.feature.feature:
-            returned.append(c)
-
-    return returned
+    return csv_crud.find_all_same_feature(db, csv.experiment_id, csv.feature.feature, csv.id)
 
 
 def apply_mean(exp, data_epochs):
@@ -737,6 +808,8 @@ def apply_standard_deviation (exp, data_epochs):
 
 
 def apply_psd(exp, epochs, bands):
+    import mne
+    from scipy.integrate import simps
     bands_array = bands.split(',')
 
     psds, freqs = mne.time_frequency.psd_welch(epochs, n_per_seg=256, picks='eeg')
@@ -891,6 +964,8 @@ def plot_average_epoch(db: Session, csv_id: int, epoch_average: EpochAverage):
 
 
 def plot_compare(db: Session, csv_id: int, epoch_compare: EpochCompare):
+    import mne
+    import matplotlib.pyplot as plt
 
     csv = csv_crud.find_by_id(db, csv_id)
 
@@ -960,6 +1035,7 @@ def plot_activity_brain(db: Session, csv_id: int, epoch_activity: EpochActivity)
 
 
 def get_epoch(rawdata, exp):
+    import mne
 
     events = mne.find_events(rawdata, shortest_event=1)
     event_id = {}
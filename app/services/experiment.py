@@ -1,4 +1,5 @@
 from typing import Optional
+from datetime import datetime
 
 from sqlalchemy.orm import Session
 from app.repositories import experiment as experiment_crud, researcher as researcher_crud
@@ -7,29 +8,28 @@ from app.schemas.experiment import ExperimentPost, ExperimentResearchers, Experi
 from app.models import models
 from app.schemas.stimulus import StimulusPost
 from app.repositories import subject as subject_crud
+from app.services import training as training_service
 import os
 import configparser
-from cryptography.fernet import Fernet
+from app.services import csv as csv_service
+from app.schemas.experiment import ExperimentResponse
 
 thisfolder = os.path.dirname(os.path.abspath(__file__))
 initfile = os.path.join(thisfolder, '../config/properties.ini')
 config = configparser.ConfigParser()
 config.read(initfile)
 
-def get_experiment_by_id(db: Session, experiment_id: int) -> models.Experiment:
-    e = experiment_crud.find_by_id(db, experiment_id)
-
-    fernet = Fernet(str.encode(config.get("SECURITY", "key")))
-
-    for csv in e.csvs:
-        csv.subject_name = fernet.decrypt(str.encode(csv.subject_name)).decode()
+def get_experiment_by_id(db: Session, experiment_id: int) -> Optional[ExperimentResponse]:
+    e = experiment_crud.find_by_id_detail(db, experiment_id)
+    if e is None:
+        return None
 
-    return experiment_crud.find_by_id(db, experiment_id)
+    return ExperimentResponse.from_orm(e).copy(update={"csvs": csv_service.to_responses(e.csvs)})
 
 
-def get_all_experiments(db: Session) -> list[models.Experiment]:
-    e = experiment_crud.find_all(db)
-    return e
+def get_all_experiments(db: Session, name: Optional[str] = None, cursor: Optional[int] = None, limit: int = 100,
+                        detail: bool = True):
+    return experiment_crud.find_page(db, name, cursor, limit, detail)
 
 
 def create_experiment(db: Session, experiment: ExperimentPost) -> Optional[Experiment]:
@@ -41,7 +41,11 @@ def create_experiment(db: Session, experiment: ExperimentPost) -> Optional[Exper
                                       description=experiment.description,
                                       researcher_creator_id=experiment.researcher_creator_id,
                                       epoch_start=experiment.epoch_start,
-                                      epoch_end=experiment.epoch_end)
+                                      epoch_end=experiment.epoch_end,
+                                      csv_count=0,
+                                      total_duration=0,
+                                      training_count=0,
+                                      last_modified=datetime.now())
 
     for x in experiment.stimuli:
         db_experiment.stimuli.append(models.Stimulus(name=x.name,
@@ -84,6 +88,14 @@ def delete_experiment(db: Session, experiment_id: int) -> bool:
             os.remove(t.path)
         except:
             pass
+        try:
+            os.remove(training_service.generate_name_weights(t.path))
+        except:
+            pass
+        try:
+            os.remove(t.checkpoint)
+        except:
+            pass
 
 
         if t.type == 'Deep Learning':
@@ -111,6 +123,7 @@ def add_researchers(db: Session, experiment_id, researchers: ExperimentResearche
         if r is not None:
             e.researchers.append(r)
 
+    e.last_modified = datetime.now()
     experiment_crud.save(db, e)
     return True
 
@@ -127,6 +140,7 @@ def delete_researchers(db: Session, experiment_id, researchers: ExperimentResear
         if x.id in researchers.researchers_id:
             e.researchers.remove(x)
 
+    e.last_modified = datetime.now()
     experiment_crud.save(db, e)
     return True
 
@@ -142,6 +156,7 @@ def add_subject(db: Session, experiment_id: int, subjects: ExperimentSubjects) -
         if subject is not None:
             e.subjects.append(subject)
 
+    e.last_modified = datetime.now()
     experiment_crud.save(db, e)
     return True
 
@@ -158,6 +173,7 @@ def delete_subjects(db: Session, experiment_id, subjects: ExperimentSubjects) ->
         if x.id in subjects.subjects_id:
             e.subjects.remove(x)
 
+    e.last_modified = datetime.now()
     experiment_crud.save(db, e)
     return True
 
@@ -188,5 +204,5 @@ def valid_device(type: str) -> bool:
     return False;
 
 
-
-
+def repair_counters(db: Session) -> int:
+    return experiment_crud.recompute_counters(db)
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from app.config.cache import TTLCache
+
+MAX_EVENTS = 1000
+IDLE_TIMEOUT = 300
+
+channels = TTLCache(maxsize=256, ttl=3600)
+lock = threading.Lock()
+
+
+class ProgressChannel:
+
+    def __init__(self):
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.count = 0
+        self.finished = False
+
+
+def get_channel(job_id: str) -> ProgressChannel:
+    with lock:
+        channel = channels.get(job_id)
+        if channel is None:
+            channel = ProgressChannel()
+            channels.set(job_id, channel)
+        return channel
+
+
+def append(job_id: str, event: dict, finished: bool):
+    channel = get_channel(job_id)
+    with lock:
+        channel.count += 1
+        channel.events.append((channel.count, event))
+        channel.finished = channel.finished or finished
+        channels.set(job_id, channel)
+
+
+def publish(job_id: str, event: dict):
+    append(job_id, event, False)
+
+
+def finish(job_id: str, event: dict):
+    append(job_id, event, True)
+
+
+def read(job_id: str, position: int):
+    channel = channels.get(job_id)
+    if channel is None:
+        return [], False
+    with lock:
+        return [x for x in channel.events if x[0] > position], channel.finished
+
+
+async def stream(job_id: str, idle_timeout: float = IDLE_TIMEOUT):
+    position = 0
+    last_event = time.monotonic()
+    while True:
+        events, finished = read(job_id, position)
+        for position, event in events:
+            yield "data: " + json.dumps(event) + "\n\n"
+
+        if finished:
+            break
+        if len(events) > 0:
+            last_event = time.monotonic()
+        elif time.monotonic() - last_event > idle_timeout:
+            yield "data: " + json.dumps({"status": "timeout"}) + "\n\n"
+            break
+        await asyncio.sleep(0.5)
@@ -3,7 +3,30 @@ from app.repositories import researcher as researcher_crud
 from app.models import models
 from app.schemas.researcher import ResearcherPost, ResearcherPutPassword, ResearcherLogin
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import bcrypt
+import os
+import configparser
+
+thisfolder = os.path.dirname(os.path.abspath(__file__))
+initfile = os.path.join(thisfolder, '../config/properties.ini')
+config = configparser.ConfigParser()
+config.read(initfile)
+
+hashing_executor = ThreadPoolExecutor(max_workers=config.getint("SECURITY", "hashing_workers", fallback=4),
+                                      thread_name_prefix="bcrypt")
+
+
+async def hash_password(password: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor, bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(10))
+
+
+async def check_password(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor, bcrypt.checkpw, password.encode('utf-8'), bytes(hashed, 'utf-8'))
+
 
 
 def get_researcher_id(db: Session, researcher_id: int) -> models.Researcher:
@@ -12,17 +35,16 @@ def get_researcher_id(db: Session, researcher_id: int) -> models.Researcher:
 def get_researcher_id_name(db: Session, researcher_id, researcher_user):
     return researcher_crud.find_by_id_user(db, researcher_id, researcher_user)
 
-def get_all_researcher(db: Session):
-    return researcher_crud.find_all(db)
+def get_all_researcher(db: Session, name: Optional[str] = None, cursor: Optional[int] = None, limit: int = 100):
+    return researcher_crud.find_page(db, name, cursor, limit)
 
 
-def create_researcher(db: Session, researcher: ResearcherPost):
+async def create_researcher(db: Session, researcher: ResearcherPost):
 
     if researcher_crud.exists_by_user_email(db, researcher.email, researcher.user):
         return None
 
-    password = researcher.password.encode('utf-8')
-    hashed = bcrypt.hashpw(password, bcrypt.gensalt(10))
+    hashed = await hash_password(researcher.password)
 
     db_researcher = models.Researcher(name=researcher.name,
                                       surname=researcher.surname,
@@ -33,40 +55,29 @@ def create_researcher(db: Session, researcher: ResearcherPost):
     return researcher_crud.save(db, db_researcher)
 
 
-def get_all_researcher_not_experiment(db: Session, experiment_id: int) -> list[models.Researcher]:
-    researchers = researcher_crud.find_all(db)
-    returned = []
-
-    for r in researchers:
-        found = False
-        for e in r.experiments:
-            if e.id == experiment_id:
-                found=True
-                break
-        if not found:
-            returned.append(r)
-
-    return returned
+def get_all_researcher_not_experiment(db: Session, experiment_id: int, name: Optional[str] = None,
+                                      cursor: Optional[int] = None, limit: int = 100):
+    return researcher_crud.find_all_not_experiment(db, experiment_id, name, cursor, limit)
 
 
-def login(db: Session, username: str, password: str):
+async def login(db: Session, username: str, password: str):
     researcher = researcher_crud.find_by_user(db, username)
 
     if researcher is None:
         return None
 
-    if bcrypt.checkpw(password.encode('utf-8'), bytes(researcher.password, 'utf-8')) and researcher.user == username:
+    if await check_password(password, researcher.password) and researcher.user == username:
         return researcher
 
     return None
 
 
-def change_password(db: Session, researcher_id: int, researcher_put: ResearcherPutPassword):
+async def change_password(db: Session, researcher_id: int, researcher_put: ResearcherPutPassword):
 
     r = researcher_crud.find_by_id(db, researcher_id)
     if r is None:
         return None
 
-    r.password = researcher_put.password
+    r.password = await hash_password(researcher_put.password)
     researcher_crud.save_new_password(db, r)
     return True
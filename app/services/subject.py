@@ -6,8 +6,8 @@ from typing import Optional
 from app.repositories import experiment as experiment_crud
 
 
-def get_all_subjects(db:Session) -> list[SubjectResponse]:
-    return subject_crud.find_all(db)
+def get_all_subjects(db:Session, name: Optional[str] = None, cursor: Optional[int] = None, limit: int = 100):
+    return subject_crud.find_page(db, name, cursor, limit)
 
 
 def get_subjects(db:Session, subject_id: int) -> Optional[SubjectResponse]:
@@ -37,21 +37,9 @@ def delete_subject(db: Session, subject_id: int) -> bool:
     return True
 
 
-def get_all_subjects_not_experiment(db: Session, experiment_id: int) -> Optional[list[models.Subject]]:
-    experiment = experiment_crud.find_by_id(db, experiment_id)
-    if experiment is None:
+def get_all_subjects_not_experiment(db: Session, experiment_id: int, name: Optional[str] = None,
+                                    cursor: Optional[int] = None, limit: int = 100):
+    if not experiment_crud.exists_by_id(db, experiment_id):
         return None
 
-    subjects = subject_crud.find_all(db)
-
-    returned = []
-    for s in subjects:
-        found = False
-        for t in experiment.subjects:
-            if s.id == t.id:
-                found = True
-                break
-        if not found:
-            returned.append(s)
-
-    return returned
\ No newline at end of file
+    return subject_crud.find_all_not_experiment(db, experiment_id, name, cursor, limit)
@@ -1,52 +1,392 @@
 from typing import Optional
-from sklearn.model_selection import train_test_split
 import sys
 import pandas as pd
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+import hashlib
 import io
+import json
 import os
+import math
+import time
+from collections import Counter
 import app.repositories.csv as csv_crud
 import app.repositories.training as training_crud
+import app.repositories.prediction as prediction_crud
 from app.models import models
-from app.schemas.training import MachineLearningPost, DeepLearningPost
+from app.schemas.training import MachineLearningPost, DeepLearningPost, MachineLearningSearchPost, CrossValidationPost, \
+    LearningCurvePost, ExtendTrainingPost, PipelinePost
 from datetime import datetime
-from joblib import dump, load
+from joblib import dump, load, Parallel, delayed, cpu_count
 import app.repositories.experiment as experiment_crud
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import learning_curve
-
-from sklearn.svm import SVC
 import numpy as np
-from sklearn.metrics import classification_report
-from tensorflow.python import keras
-from tensorflow.python.keras import Sequential, optimizers
-from tensorflow.python.keras.layers import Dense
-from matplotlib import pyplot as plt
-import base64
+from app.config.cache import TTLCache
+from app.services import progress as progress_service
+
+learning_curve_cache = TTLCache(maxsize=64)
+
 
-import tensorflow as tf
+CROSS_VALIDATION_SCORING = ['accuracy', 'balanced_accuracy', 'f1_macro']
 
 
 def create_training_machine(db: Session, training_post: MachineLearningPost):
+    from sklearn.metrics import classification_report
+    exp = experiment_crud.find_by_id(db, training_post.exp_id)
+    if exp is None:
+        return None
+
+    db_training = models.Training(
+        name=training_post.name,
+        experiment_id=training_post.exp_id,
+        type='Machine Learning',
+        testing_data=training_post.testing_data)
+
+    algorithm = training_post.algorithm.__class__.__name__
+    clf = get_pipeline(get_classifier(algorithm, training_post.algorithm.dict()), training_post.pipeline)
+    description = get_classifier_description(algorithm, training_post.algorithm.dict()) + \
+                  get_pipeline_description(training_post.pipeline)
+
+    if training_post.chunk_size is not None:
+        if not hasattr(clf, 'partial_fit'):
+            return "Algorithm does not support incremental training"
+        if training_post.cross_validation is not None:
+            return "Cross-validation is not available in incremental training"
+
+        description += "\nTraining Data = " + str(training_post.training_data) + "%, Testing Data = " + str(training_post.testing_data) + "%" + \
+                       "\nIncremental training (chunk size: " + str(training_post.chunk_size) + ")"
+        db_training.incremental = True
+
+        csvs = find_csvs(db, training_post.csvs, db_training)
+        if len(csvs) == 0:
+            return "No CSV could be read"
+        classes = np.array([float(stimulus.name) for stimulus in exp.stimuli])
+        for x, y in iter_chunks(csvs, training_post.chunk_size, exp.stimuli, training_post.testing_data, 'train'):
+            clf.partial_fit(x, y, classes=classes)
+
+        validation = evaluate_incremental(clf, csvs, training_post.chunk_size, exp.stimuli, training_post.testing_data)
+
+    elif training_post.cross_validation is not None:
+        groups = []
+        df = read_csvs(db, training_post.csvs, db_training, groups)
+
+        scores = cross_validation(clf, df, groups, training_post.cross_validation)
+        if type(scores) == str:
+            return scores
+        validation = get_cross_validation_report(scores)
+
+        description += "\n" + str(training_post.cross_validation.folds) + "-fold " + \
+                       training_post.cross_validation.type + " cross-validation"
+
+        clf.fit(X=df.drop(columns=["Stimulus"]), y=df["Stimulus"])
+        del df
+
+    else:
+        df = read_csvs(db, training_post.csvs, db_training)
+        description += "\nTraining Data = " + str(training_post.training_data) + "%, Testing Data = " + str(training_post.testing_data) + "%"
+
+        X_train, X_test, y_train, y_test = train_test(df, exp.stimuli, training_post.testing_data)
+
+        del df
+        clf.fit(X=X_train, y=y_train)
+        validation = str(classification_report(y_test, clf.predict(X_test)))
+
+    name_model = generate_name_model('machine')
+    db_training.validation = validation
+    db_training.path = name_model
+    db_training.description = description
+
+    dump(clf, db_training.path)
+
+    save_training(db, db_training)
+
+
+def extend_training(db: Session, training_id: int, extend_post: ExtendTrainingPost):
+    training = training_crud.find_by_id(db, training_id)
+    if training is None:
+        return None
+
+    exp = experiment_crud.find_by_id(db, training.experiment_id)
+    if exp is None:
+        return None
+
+    if training.type != 'Machine Learning' or not training.incremental:
+        return "Only trainings created with incremental training can be extended"
+
+    clf = load(training.path)
+    if not hasattr(clf, 'partial_fit'):
+        return "Training does not support incremental updates"
+
+    testing = training.testing_data
+
+    new_csvs = []
+    for x in extend_post.csvs:
+        c = csv_crud.find_by_id(db, x)
+        if c is not None and c not in training.csvs and os.path.exists(c.path) \
+                and c.feature is not None and c.feature.feature == training.feature:
+            new_csvs.append(c)
+
+    if len(new_csvs) == 0:
+        return "No new CSV with the same feature"
+
+    for x, y in iter_chunks(new_csvs, extend_post.chunk_size, exp.stimuli, testing, 'train'):
+        clf.partial_fit(x, y)
+
+    training.csvs.extend(new_csvs)
+    training.validation = evaluate_incremental(clf, training.csvs, extend_post.chunk_size, exp.stimuli, testing)
+    training.description += "\nExtended with " + str(len(new_csvs)) + " CSV"
+
+    dump(clf, training.path)
+    prediction_crud.delete_by_training(db, training.id)
+    training_crud.save(db, training)
+    return True
+
+
+def cross_validation(clf, df, groups: list[int], cross_validation_post: CrossValidationPost):
+    from sklearn.model_selection import StratifiedKFold, GroupKFold, cross_validate
+    if cross_validation_post.type == 'stratified':
+        cv = StratifiedKFold(n_splits=cross_validation_post.folds, shuffle=True, random_state=42)
+    else:
+        cv = GroupKFold(n_splits=cross_validation_post.folds)
+
+    try:
+        return cross_validate(single_job(clf), df.drop(columns=["Stimulus"]).values, df["Stimulus"].values,
+                              groups=groups, cv=cv, scoring=CROSS_VALIDATION_SCORING, n_jobs=-1)
+    except ValueError as e:
+        return str(e)
+
+
+def get_cross_validation_report(scores: dict):
+    scoring = CROSS_VALIDATION_SCORING
+    text = ""
+    for i in range(len(scores["test_" + scoring[0]])):
+        text += "Fold " + str(i + 1) + ": "
+        for metric in scoring:
+            text += metric + " " + str(round(scores["test_" + metric][i], 4)) + ", "
+        text = text[:-2] + "\n"
+
+    text += "\nMean: "
+    for metric in scoring:
+        text += metric + " " + str(round(np.mean(scores["test_" + metric]), 4)) + \
+                " (std " + str(round(np.std(scores["test_" + metric]), 4)) + "), "
+    return text[:-2]
+
+
+def search_training_machine(db: Session, training_post: MachineLearningSearchPost):
+    from sklearn.metrics import classification_report
+    from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold, cross_val_score
     exp = experiment_crud.find_by_id(db, training_post.exp_id)
     if exp is None:
         return None
 
-    clf = None
-    description = ''
     db_training = models.Training(
         name=training_post.name,
         experiment_id=training_post.exp_id,
-        type='Machine Learning')
+        type='Machine Learning',
+        testing_data=training_post.testing_data)
+
+    df = read_csvs(db, training_post.csvs, db_training)
+    X_train, X_test, y_train, y_test = train_test(df, exp.stimuli, training_post.testing_data)
+    del df
+
+    candidates = []
+    for algorithm in training_post.algorithms:
+        name = algorithm.__class__.__name__[:-len('Search')]
+        if training_post.search == 'grid':
+            params = ParameterGrid(algorithm.dict())
+        else:
+            params = ParameterSampler(algorithm.dict(), n_iter=training_post.n_iter, random_state=42)
+        for p in params:
+            candidates.append((name, p))
+
+    cv = StratifiedKFold(n_splits=training_post.folds, shuffle=True, random_state=42)
+    x = X_train.values
+    y = y_train.values
+    batch_size = cpu_count()
+    start = time.monotonic()
+    results = []
+
+    try:
+        with Parallel(n_jobs=-1) as parallel:
+            for i in range(0, len(candidates), batch_size):
+                if training_post.time_budget is not None and time.monotonic() - start > training_post.time_budget:
+                    break
+                batch = candidates[i:i + batch_size]
+                scores = parallel(delayed(cross_val_score)(get_pipeline(get_classifier(name, p), training_post.pipeline), x, y, cv=cv) for name, p in batch)
+                for (name, p), score in zip(batch, scores):
+                    results.append({
+                        "algorithm": name,
+                        "params": p,
+                        "mean_score": float(np.mean(score)),
+                        "std_score": float(np.std(score)),
+                        "fold_scores": score.tolist()})
+    except ValueError as e:
+        return str(e)
+
+    if len(results) == 0:
+        return "Time budget exhausted before any candidate was evaluated"
+
+    results.sort(key=lambda r: r["mean_score"], reverse=True)
+    for i in range(len(results)):
+        results[i]["rank"] = i + 1
+
+    best = results[0]
+    clf = get_pipeline(get_classifier(best["algorithm"], best["params"]), training_post.pipeline)
+    clf.fit(X=X_train, y=y_train)
+
+    description = get_classifier_description(best["algorithm"], best["params"]) + \
+                  get_pipeline_description(training_post.pipeline)
+    description += "\nBest of " + str(len(results)) + " candidates (" + training_post.search + " search, " + \
+                   str(training_post.folds) + "-fold CV score: " + str(round(best["mean_score"], 4)) + ")"
+    description += "\nTraining Data = " + str(training_post.training_data) + "%, Testing Data = " + str(training_post.testing_data) + "%"
+
+    name_model = generate_name_model('machine')
+    db_training.validation = str(classification_report(y_test, clf.predict(X_test)))
+    db_training.path = name_model
+    db_training.description = description
+
+    dump(clf, db_training.path)
+
+    save_training(db, db_training)
+
+    return {"training_id": db_training.id,
+            "evaluated": len(results),
+            "candidates": len(candidates),
+            "results": results}
+
+
+def get_learning_curve(db: Session, learning_curve_post: LearningCurvePost):
+    from sklearn.model_selection import StratifiedKFold, learning_curve
+    exp = experiment_crud.find_by_id(db, learning_curve_post.exp_id)
+    if exp is None:
+        return None
+
+    csvs = []
+    for x in learning_curve_post.csvs:
+        c = csv_crud.find_by_id(db, x)
+        if c is not None:
+            csvs.append(c)
+
+    key = (tuple((c.id, c.path) for c in csvs), learning_curve_post.json(exclude={'csvs'}))
+    returned = learning_curve_cache.get(key)
+    if returned is not None:
+        return returned
 
     dfs = []
-    for x in training_post.csvs:
+    for c in csvs:
+        try:
+            dfs.append(pd.read_csv(c.path))
+        except FileNotFoundError:
+            pass
+
+    if len(dfs) == 0:
+        return None
+
+    df = pd.concat(dfs, ignore_index=True)
+    del dfs
+
+    algorithm = learning_curve_post.algorithm.__class__.__name__
+    clf = get_pipeline(get_classifier(algorithm, learning_curve_post.algorithm.dict()), learning_curve_post.pipeline)
+    cv = StratifiedKFold(n_splits=learning_curve_post.folds, shuffle=True, random_state=42)
+
+    try:
+        train_sizes, train_scores, validation_scores = learning_curve(
+            single_job(clf), df.drop(columns=["Stimulus"]).values, df["Stimulus"].values,
+            train_sizes=learning_curve_post.train_sizes, cv=cv, n_jobs=-1)
+    except ValueError as e:
+        return str(e)
+
+    returned = {"train_sizes": train_sizes.tolist(),
+                "train_scores_mean": np.mean(train_scores, axis=1).tolist(),
+                "train_scores_std": np.std(train_scores, axis=1).tolist(),
+                "validation_scores_mean": np.mean(validation_scores, axis=1).tolist(),
+                "validation_scores_std": np.std(validation_scores, axis=1).tolist()}
+
+    learning_curve_cache.set(key, returned)
+    return returned
+
+
+def find_csvs(db: Session, csvs: list[int], db_training: models.Training) -> list[models.CSV]:
+    returned = []
+    for x in csvs:
+        c = csv_crud.find_by_id(db, x)
+        if c is not None and os.path.exists(c.path):
+            returned.append(c)
+            if c not in db_training.csvs:
+                db_training.csvs.append(c)
+            if db_training.feature is None:
+                db_training.feature = c.feature.feature
+
+    return returned
+
+
+def iter_chunks(csvs: list[models.CSV], chunk_size: int, stimuli, testing: float, part: str):
+    for c in csvs:
+        counts = pd.read_csv(c.path, usecols=["Stimulus"])["Stimulus"].value_counts()
+        seen = {}
+        for df in pd.read_csv(c.path, chunksize=chunk_size):
+            x_parts, y_parts = [], []
+            for stimulus in stimuli:
+                value = float(stimulus.name)
+                df_stimulus = df.loc[df["Stimulus"] == value]
+                total = counts.get(value, 0)
+                n_train = total - math.ceil(total * testing / 100)
+                start = seen.get(value, 0)
+                seen[value] = start + df_stimulus.shape[0]
+                split = min(max(n_train - start, 0), df_stimulus.shape[0])
+                if part == 'train':
+                    df_stimulus = df_stimulus.iloc[:split]
+                else:
+                    df_stimulus = df_stimulus.iloc[split:]
+                x_parts.append(df_stimulus.drop(columns=["Stimulus"]))
+                y_parts.append(df_stimulus["Stimulus"])
+
+            x = pd.concat(x_parts, axis=0, ignore_index=True)
+            if x.shape[0] > 0:
+                yield x, pd.concat(y_parts, axis=0, ignore_index=True)
+
+
+def evaluate_incremental(clf, csvs: list[models.CSV], chunk_size: int, stimuli, testing: float):
+    from sklearn.metrics import classification_report
+    pairs = Counter()
+    for x, y in iter_chunks(csvs, chunk_size, stimuli, testing, 'test'):
+        pairs.update(zip(y.tolist(), clf.predict(x).tolist()))
+
+    if len(pairs) == 0:
+        return "No testing data"
+
+    y_true, y_pred, weights = [], [], []
+    for (true, pred), count in pairs.items():
+        y_true.append(true)
+        y_pred.append(pred)
+        weights.append(count)
+
+    return str(classification_report(y_true, y_pred, sample_weight=weights))
+
+
+def get_dense_dataset(csvs: list[models.CSV], chunk_size: int, stimuli, testing: float, part: str):
+    import tensorflow as tf
+    n_features = pd.read_csv(csvs[0].path, nrows=0).shape[1] - 1
+
+    def batches():
+        for x, y in iter_chunks(csvs, chunk_size, stimuli, testing, part):
+            yield x.values.astype(np.float32), y.values.astype(np.float32)
+
+    return tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                          tf.TensorSpec(shape=(None,), dtype=tf.float32)))
+
+
+def read_csvs(db: Session, csvs: list[int], db_training: models.Training, groups: Optional[list[int]] = None):
+    dfs = []
+    for x in csvs:
         c = csv_crud.find_by_id(db, x)
         if c is not None:
             try:
                 df = pd.read_csv(c.path)
                 dfs.append(df)
+                if groups is not None:
+                    groups.extend([c.id] * df.shape[0])
                 db_training.csvs.append(c)
                 if db_training.feature is None:
                     db_training.feature = c.feature.feature
@@ -55,38 +395,135 @@ def create_training_machine(db: Session, training_post: MachineLearningPost):
             except FileNotFoundError:
                 pass
 
-    df = pd.concat(dfs, ignore_index=True)
+    return pd.concat(dfs, ignore_index=True)
 
-    if training_post.algorithm.__class__.__name__ == 'KNN':
-        clf = KNeighborsClassifier(n_neighbors=training_post.algorithm.n_neighbors)
-        description = "KNN (n_neighbors: " + str(training_post.algorithm.n_neighbors) + ")"
 
-    elif training_post.algorithm.__class__.__name__ == 'RandomForest':
-        clf = RandomForestClassifier(n_estimators=training_post.algorithm.n_estimators)
+def get_classifier(algorithm: str, params: dict):
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+    from sklearn.svm import SVC
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.svm import LinearSVC
+    from sklearn.kernel_approximation import Nystroem, RBFSampler
+    from sklearn.pipeline import make_pipeline
+    if algorithm == 'KNN':
+        return KNeighborsClassifier(n_neighbors=params['n_neighbors'], algorithm=params.get('index', 'auto'),
+                                    leaf_size=params.get('leaf_size', 30), n_jobs=params.get('n_jobs', 1))
 
-        description = "Random Forest (n_estimatos: " + str(training_post.algorithm.n_estimators) + ")"
+    elif algorithm == 'RandomForest':
+        return RandomForestClassifier(n_estimators=params['n_estimators'], n_jobs=params.get('n_jobs', 1))
 
-    elif training_post.algorithm.__class__.__name__ == 'SVM':
-        clf = SVC(kernel=training_post.algorithm.kernel)
+    elif algorithm == 'SVM':
+        return SVC(kernel=params['kernel'])
 
-        description = "SVM (kernel: " + training_post.algorithm.kernel + ")"
+    elif algorithm == 'SGD':
+        return SGDClassifier(loss=params['loss'], alpha=params['alpha'], random_state=42)
 
-    description += "\nTraining Data = " + str(training_post.training_data) + "%, Testing Data = " + str(training_post.testing_data) + "%"
+    elif algorithm == 'NaiveBayes':
+        return GaussianNB(var_smoothing=params['var_smoothing'])
 
+    elif algorithm == 'LinearSVM':
+        return LinearSVC(C=params['c'], dual=False)
 
-    X_train, X_test, y_train, y_test = train_test(df, exp.stimuli, training_post.testing_data)
+    elif algorithm == 'ApproximateSVM':
+        if params['approximation'] == 'nystroem':
+            approximation = Nystroem(kernel='rbf', gamma=params['gamma'], n_components=params['n_components'], random_state=42)
+        else:
+            approximation = RBFSampler(gamma=params['gamma'], n_components=params['n_components'], random_state=42)
+        return make_pipeline(approximation, LinearSVC(dual=False))
 
-    del df
-    clf.fit(X=X_train, y=y_train)
+    elif algorithm == 'GradientBoosting':
+        return HistGradientBoostingClassifier(max_iter=params['max_iter'], learning_rate=params['learning_rate'],
+                                              random_state=42)
 
-    name_model = generate_name_model('machine')
-    db_training.validation = str(classification_report(y_test, clf.predict(X_test)))
-    db_training.path = name_model
-    db_training.description = description
 
-    dump(clf, db_training.path)
+def single_job(clf):
+    from sklearn.base import clone
+    params = {k: 1 for k in clf.get_params() if k == 'n_jobs' or k.endswith('__n_jobs')}
+    return clone(clf).set_params(**params)
+
+
+def get_pipeline(clf, pipeline_post: Optional[PipelinePost]):
+    if pipeline_post is None:
+        return clf
+
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.decomposition import PCA
+    steps = []
+    if pipeline_post.scale:
+        steps.append(StandardScaler())
+    if pipeline_post.pca_components is not None:
+        if pipeline_post.pca_components >= 1:
+            steps.append(PCA(n_components=int(pipeline_post.pca_components), random_state=42))
+        else:
+            steps.append(PCA(n_components=pipeline_post.pca_components, random_state=42))
+
+    if len(steps) == 0:
+        return clf
+    return make_pipeline(*steps, clf)
+
+
+def get_pipeline_description(pipeline_post: Optional[PipelinePost]):
+    if pipeline_post is None:
+        return ""
 
-    training_crud.save(db, db_training)
+    description = ""
+    if pipeline_post.scale:
+        description += "\nStandardisation"
+    if pipeline_post.pca_components is not None:
+        if pipeline_post.pca_components >= 1:
+            description += "\nPCA (components: " + str(int(pipeline_post.pca_components)) + ")"
+        else:
+            description += "\nPCA (explained variance: " + str(pipeline_post.pca_components) + ")"
+    return description
+
+
+def get_classifier_description(algorithm: str, params: dict):
+    if algorithm == 'KNN':
+        return "KNN (n_neighbors: " + str(params['n_neighbors']) + ", index: " + params.get('index', 'auto') + \
+               ", leaf_size: " + str(params.get('leaf_size', 30)) + ")"
+
+    elif algorithm == 'RandomForest':
+        return "Random Forest (n_estimatos: " + str(params['n_estimators']) + ")"
+
+    elif algorithm == 'SVM':
+        return "SVM (kernel: " + params['kernel'] + ")"
+
+    elif algorithm == 'SGD':
+        return "SGD (loss: " + params['loss'] + ", alpha: " + str(params['alpha']) + ")"
+
+    elif algorithm == 'NaiveBayes':
+        return "Naive Bayes (var_smoothing: " + str(params['var_smoothing']) + ")"
+
+    elif algorithm == 'LinearSVM':
+        return "Linear SVM (C: " + str(params['c']) + ")"
+
+    elif algorithm == 'ApproximateSVM':
+        return "Approximate RBF SVM (approximation: " + params['approximation'] + \
+               ", n_components: " + str(params['n_components']) + ", gamma: " + str(params['gamma']) + ")"
+
+    elif algorithm == 'GradientBoosting':
+        return "Histogram Gradient Boosting (max_iter: " + str(params['max_iter']) + \
+               ", learning_rate: " + str(params['learning_rate']) + ")"
+
+
+def save_training(db: Session, training: models.Training):
+    if training.id is None:
+        training.timestamp = datetime.now()
+        experiment_crud.update_counters(db, training.experiment_id, trainings=1)
+    return training_crud.save(db, training)
+
+
+def backfill_timestamps(db: Session) -> int:
+    count = 0
+    for training in training_crud.find_all_without_timestamp(db):
+        if training.path is not None and os.path.exists(training.path):
+            training.timestamp = datetime.fromtimestamp(os.path.getmtime(training.path))
+            count += 1
+    db.commit()
+    return count
 
 
 def delete_training(db: Session, training_id: int):
@@ -95,6 +532,14 @@ def delete_training(db: Session, training_id: int):
         os.remove(training.path)
     except:
         pass
+    try:
+        os.remove(generate_name_weights(training.path))
+    except:
+        pass
+    try:
+        os.remove(training.checkpoint)
+    except:
+        pass
     try:
         os.remove(training.accuracy)
     except:
@@ -106,30 +551,23 @@ def delete_training(db: Session, training_id: int):
         except:
             pass
 
+    experiment_crud.update_counters(db, training.experiment_id, trainings=-1)
     training_crud.delete(db, training)
 
 
-def find_all_csv(db: Session, csv_id: int) -> Optional[list[models.Training]]:
-    csv = csv_crud.find_by_id(db, csv_id)
-    if csv is None:
+def find_all_csv(db: Session, csv_id: int, type: Optional[str] = None, cursor: Optional[int] = None, limit: int = 100):
+    if csv_crud.find_by_id(db, csv_id) is None:
         return None
-    returned = []
-    for training in csv.trainings:
-        try:
-            with open(training.path_accuracy, 'rb') as f:
-                training.path_accuracy = base64.b64encode(f.read())
-        except:
-            pass
 
-        try:
-            with open(training.path_loss, 'rb') as f:
-                training.path_loss = base64.b64encode(f.read())
-        except:
-            pass
+    return training_crud.find_page_by_csv(db, csv_id, type, cursor, limit)
 
-        returned.append(training)
 
-    return returned
+def generate_name_checkpoint(path_model: str):
+    return os.path.splitext(path_model)[0] + "_checkpoint.h5"
+
+
+def generate_name_weights(path_model: str):
+    return os.path.splitext(path_model)[0] + ".npz"
 
 
 def generate_name_model(type: str):
@@ -146,25 +584,13 @@ def find_all_predictable(db: Session, csv_id: int) -> Optional[list[models.Train
     if csv is None:
         return None
 
-    exp = experiment_crud.find_by_id(db, csv.experiment_id)
-
-    if exp is None:
+    if not experiment_crud.exists_by_id(db, csv.experiment_id):
         return None
 
+    if csv.feature is None:
+        return []
 
-    trainings = []
-    for train in exp.trainings:
-        if train.feature == csv.feature.feature:
-            found = False
-            i = 0
-            while i < len(train.csvs) and not found:
-                if train.csvs[i].id == csv_id:
-                    found = True
-                i = i + 1
-            if not found:
-                trainings.append(train)
-
-    return trainings
+    return training_crud.find_all_predictable(db, csv.experiment_id, csv.feature.feature, csv_id)
 
 
 def predict(db: Session, training_id: int, csv_id: int):
@@ -176,11 +602,49 @@ def predict(db: Session, training_id: int, csv_id: int):
     if csv is None:
         return
 
+    if not is_finished(training):
+        return NOT_FINISHED
+
+    prediction = prediction_crud.find_by_training_csv(db, training_id, csv_id)
+    if prediction is not None and prediction.csv_version == csv.version:
+        return {"text": prediction.text, "n_jumps": prediction.n_jumps}
+
+    returned = compute_prediction(training, csv)
+    if type(returned) == dict:
+        if prediction is None:
+            prediction = models.Prediction(training_id=training_id, csv_id=csv_id)
+        prediction.csv_version = csv.version
+        prediction.text = returned["text"]
+        prediction.n_jumps = returned["n_jumps"]
+        try:
+            prediction_crud.save(db, prediction)
+        except IntegrityError:
+            db.rollback()
+            prediction = prediction_crud.find_by_training_csv(db, training_id, csv_id)
+            if prediction is not None:
+                return {"text": prediction.text, "n_jumps": prediction.n_jumps}
+
+    return returned
+
+
+def delete_duplicate_predictions(db: Session) -> int:
+    return prediction_crud.delete_duplicates(db)
+
+
+NOT_FINISHED = "Training is not finished"
+
+
+def is_finished(training: models.Training) -> bool:
+    return training.status in (None, 'finished') and training.path is not None and os.path.exists(training.path)
+
+
+def compute_prediction(training: models.Training, csv: models.CSV):
     df = pd.read_csv(csv.path)
     y = df["Stimulus"]
     x = df.drop(columns=["Stimulus"])
 
     if training.type == 'Machine Learning':
+        from sklearn.metrics import classification_report
 
         clf = load(training.path)
         cont = 0
@@ -197,20 +661,37 @@ def predict(db: Session, training_id: int, csv_id: int):
         return {"text": text, "n_jumps": cont}
 
     elif training.type == 'Deep Learning':
+        if 'tensorflow' not in sys.modules and os.path.exists(generate_name_weights(training.path)):
+            try:
+                returned = evaluate_dense_weights(generate_name_weights(training.path), x.values, y.values)
+            except Exception:
+                returned = None
+
+            if returned is not None:
+                loss, accuracy = returned
+                text = "Loss: " + str(loss) +"\nAccuracy " + str(accuracy)
+                return {"text": text, "n_jumps": 2}
+
+        import tensorflow as tf
+        from tensorflow.python import keras
+
         model = keras.models.load_model(training.path)
         try:
             loss, accuracy = model.evaluate(x=x, y=y, verbose=0)
             text = "Loss: " + str(loss) +"\nAccuracy " + str(accuracy)
             return {"text": text, "n_jumps": 2}
-        except tf.errors.InvalidArgumentError as e:
+        except (tf.errors.InvalidArgumentError, ValueError) as e:
             return str(e)
 
 
 def create_training_deep(db: Session, training_post: DeepLearningPost):
+    from tensorflow.python.keras import Sequential, optimizers
+    from tensorflow.python.keras.layers import Dense
     exp = experiment_crud.find_by_id(db, training_post.exp_id)
     if exp is None:
         return None
 
+    params = training_post.json()
     description = 'Optimizer: ' + training_post.optimizer.capitalize() + ' Loss: ' + training_post.loss.capitalize() + ", "
     if training_post.type == 'manual':
         description += "Learning Rate: " + str(training_post.learning_rate) + "\n"
@@ -220,7 +701,8 @@ def create_training_deep(db: Session, training_post: DeepLearningPost):
     db_training = models.Training(
         name=training_post.name,
         experiment_id=training_post.exp_id,
-        type='Deep Learning'
+        type='Deep Learning',
+        testing_data=training_post.testing_data
     )
 
     model = Sequential()
@@ -272,93 +754,357 @@ def create_training_deep(db: Session, training_post: DeepLearningPost):
     model.compile(loss=training_post.loss, optimizer=opt, metrics=['accuracy'])
 
 
-    dfs = []
-    for x in training_post.csvs:
-        c = csv_crud.find_by_id(db, x)
-        if c is not None:
-            try:
-                df = pd.read_csv(c.path)
-                dfs.append(df)
-                db_training.csvs.append(c)
-                if db_training.feature is None:
+    db_training.description = description
+    db_training.params = params
 
-                    db_training.feature = c.feature.feature
+    data = get_deep_data(db, training_post, exp, db_training)
+    if type(data) == str:
+        return data
 
+    if training_post.checkpoint_every is not None:
+        db_training.path = generate_name_model('deep')
+        db_training.checkpoint = generate_name_checkpoint(db_training.path)
+        db_training.status = 'running'
+        db_training.epoch = 0
+        db_training.validation = "Training in progress"
+        save_training(db, db_training)
 
-            except FileNotFoundError:
-                pass
+    return fit_deep(db, db_training, model, training_post, data, 0, [])
 
-    df = pd.concat(dfs, ignore_index=True)
 
-    X_train, X_test, y_train, y_test = train_test(df, exp.stimuli, training_post.testing_data)
+def resume_training_deep(db: Session, training_id: int, job_id: Optional[str]):
+    from tensorflow.python import keras
+    training = training_crud.find_by_id(db, training_id)
+    if training is None:
+        return None
 
-    del df
+    exp = experiment_crud.find_by_id(db, training.experiment_id)
+    if exp is None:
+        return None
 
+    if training.status == 'finished' or training.checkpoint is None or not os.path.exists(training.checkpoint):
+        return "Training has no checkpoint to resume"
 
-    oldStdout = sys.stdout
-    sys.stdout = mystdout = io.StringIO()
-    try:
-        history = model.fit(x=X_train, y=y_train, epochs=training_post.epochs, verbose=1)
-        sys.stdout = oldStdout
+    training_post = DeepLearningPost.parse_raw(training.params)
+    training_post.job_id = job_id
+
+    data = get_deep_data(db, training_post, exp, training)
+    if type(data) == str:
+        return data
+
+    history = []
+    if training.history is not None:
+        history = json.loads(training.history)
+
+    model = keras.models.load_model(training.checkpoint)
+    prediction_crud.delete_by_training(db, training.id)
+    training.status = 'running'
+    training_crud.save(db, training)
+
+    return fit_deep(db, training, model, training_post, data, training.epoch, history)
+
+
+def get_deep_data(db: Session, training_post: DeepLearningPost, exp: models.Experiment, db_training: models.Training):
+    if training_post.chunk_size is None:
+        df = read_csvs(db, training_post.csvs, db_training)
+
+        X_train, X_test, y_train, y_test = train_test(df, exp.stimuli, training_post.testing_data)
+
+        del df
+        train_data = {"x": X_train, "y": y_train}
+        test_data = {"x": X_test, "y": y_test}
+
+        if training_post.early_stopping is not None:
+            from sklearn.model_selection import train_test_split
+            X_train, X_val, y_train, y_val = train_test_split(
+                X_train, y_train, test_size=training_post.early_stopping.validation_data / 100,
+                random_state=42, stratify=y_train)
+            train_data = {"x": X_train, "y": y_train, "validation_data": (X_val, y_val)}
+
+    else:
+        if training_post.early_stopping is not None:
+            return "Early stopping is not available in incremental training"
+
+        csvs = find_csvs(db, training_post.csvs, db_training)
+        if len(csvs) == 0:
+            return "No CSV could be read"
+        train_data = {"x": get_dense_dataset(csvs, training_post.chunk_size, exp.stimuli, training_post.testing_data, 'train')}
+        test_data = {"x": get_dense_dataset(csvs, training_post.chunk_size, exp.stimuli, training_post.testing_data, 'test')}
 
+    return train_data, test_data
 
-        plt.figure(figsize=(11.5, 8))
-        plt.plot(history.history['accuracy'])
-        plt.ylabel('Accuracy')
-        plt.xlabel('Epoch')
 
-        name_img_accuracy = generate_name_file("imgs", "accuracy")
-        plt.savefig(name_img_accuracy)
+def fit_deep(db: Session, db_training: models.Training, model, training_post: DeepLearningPost,
+             data, initial_epoch: int, history: list):
+    import tensorflow as tf
+    train_data, test_data = data
 
-        plt.figure(figsize=(11.5, 8))
-        plt.plot(history.history['loss'])
-        plt.ylabel('Loss')
-        plt.xlabel('Epoch')
-        name_img_loss = generate_name_file("imgs", "loss")
-        plt.savefig(name_img_loss)
+    callbacks = [get_progress_callback(training_post.job_id, history)]
+    if training_post.checkpoint_every is not None:
+        callbacks.append(get_checkpoint_callback(db, db_training, training_post.checkpoint_every, history))
 
-        loss, accuracy = model.evaluate(x=X_test, y=y_test, verbose=0)
+    early_stopping = None
+    if training_post.early_stopping is not None:
+        from tensorflow.python.keras.callbacks import EarlyStopping
+        early_stopping = EarlyStopping(monitor='val_loss', patience=training_post.early_stopping.patience,
+                                       restore_best_weights=True)
+        callbacks.append(early_stopping)
+
+    try:
+        model.fit(**train_data, epochs=training_post.epochs, initial_epoch=initial_epoch, verbose=0,
+                  callbacks=callbacks)
+
+        loss, accuracy = model.evaluate(**test_data, verbose=0)
         text = "Loss: " + str(loss) + ", Accuracy " + str(accuracy)
 
 
-    except ValueError as e:
+    except (tf.errors.OpError, ValueError) as e:
+        if db_training.id is not None:
+            db_training.status = 'failed'
+            save_training(db, db_training)
+        if training_post.job_id is not None:
+            progress_service.finish(training_post.job_id, {"status": "error", "detail": str(e)})
         return str(e)
 
-    name_model = generate_name_model('deep')
-    db_training.path = name_model
-    db_training.path_loss = name_img_loss
-    db_training.path_accuracy = name_img_accuracy
-    db_training.description = description
+    if db_training.path is None:
+        db_training.path = generate_name_model('deep')
+    db_training.history = json.dumps(history)
+    db_training.status = 'finished'
+    db_training.epoch = len(history)
+
+    if early_stopping is not None and early_stopping.stopped_epoch > 0:
+        db_training.stopped_epoch = early_stopping.stopped_epoch + 1
+        db_training.description += "\nEarly stopping at epoch " + str(db_training.stopped_epoch) + \
+                                   " (patience: " + str(training_post.early_stopping.patience) + ")"
 
-    db_training.validation = text + "\n" + mystdout.getvalue()
+    db_training.validation = text + "\n" + get_history_report(history)
+    set_model_metadata(db_training, model)
 
+    checkpoint = db_training.checkpoint
+    db_training.checkpoint = None
     try:
-        training_crud.save(db, db_training)
-        model.save(name_model)
+        save_training(db, db_training)
+        model.save(db_training.path)
+        export_dense_weights(model, generate_name_weights(db_training.path), training_post.loss)
     except:
-
-        os.remove(name_img_accuracy)
-        os.remove(name_img_loss)
+        if training_post.job_id is not None:
+            progress_service.finish(training_post.job_id, {"status": "error", "detail": "Internal Server Error"})
         return "Internal Server Error"
 
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    if training_post.job_id is not None:
+        progress_service.finish(training_post.job_id, {"status": "finished", "training_id": db_training.id,
+                                                       "loss": loss, "accuracy": accuracy})
     return True
 
 
-def get_summary(db: Session, training_id: int):
+def get_checkpoint_callback(db: Session, db_training: models.Training, every: int, history: list):
+    from tensorflow.python.keras.callbacks import Callback
+
+    class CheckpointCallback(Callback):
+
+        def on_epoch_end(self, epoch, logs=None):
+            if (epoch + 1) % every == 0:
+                self.model.save(db_training.checkpoint)
+                db_training.epoch = epoch + 1
+                db_training.history = json.dumps(history)
+                save_training(db, db_training)
+
+    return CheckpointCallback()
+
+
+def get_progress_callback(job_id: Optional[str], history: list):
+    from tensorflow.python.keras.callbacks import Callback
+
+    class ProgressCallback(Callback):
+
+        def on_epoch_end(self, epoch, logs=None):
+            entry = {"epoch": epoch + 1}
+            for key, value in (logs or {}).items():
+                entry[key] = float(value)
+            history.append(entry)
+            if job_id is not None:
+                progress_service.publish(job_id, entry)
 
+    return ProgressCallback()
+
+
+def get_history_report(history: list):
+    text = ""
+    for entry in history:
+        text += "Epoch " + str(entry["epoch"]) + "/" + str(len(history))
+        for key, value in entry.items():
+            if key != "epoch":
+                text += " - " + key + ": " + str(round(value, 4))
+        text += "\n"
+    return text
+
+
+def get_training(db: Session, training_id: int) -> Optional[models.Training]:
+    return training_crud.find_by_id(db, training_id)
+
+
+def get_training_detail(db: Session, training_id: int) -> Optional[models.Training]:
+    return training_crud.find_by_id_detail(db, training_id)
+
+
+def get_history_etag(training: models.Training, metric: str):
+    if training.history is None:
+        source = str(training.path_accuracy) + str(training.path_loss)
+    else:
+        source = training.history
+    return '"' + hashlib.md5((metric + source).encode()).hexdigest() + '"'
+
+
+def plot_history(training: models.Training, metric: str) -> Optional[bytes]:
+    if training.history is None:
+        path = training.path_accuracy if metric == 'accuracy' else training.path_loss
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except:
+            return None
+
+    values = []
+    for entry in json.loads(training.history):
+        if metric in entry:
+            values.append(entry[metric])
+
+    if len(values) == 0:
+        return None
+
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(11.5, 8))
+    ax = figure.subplots()
+    ax.plot(range(1, len(values) + 1), values)
+    ax.set_ylabel(metric.capitalize())
+    ax.set_xlabel('Epoch')
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+DENSE_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+    'tanh': np.tanh,
+    'softplus': lambda x: np.logaddexp(0, x),
+    'softsign': lambda x: x / (1 + np.abs(x)),
+    'elu': lambda x: np.where(x > 0, x, np.expm1(x)),
+    'selu': lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(x)),
+    'exponential': np.exp,
+    'swish': lambda x: x / (1 + np.exp(-x)),
+    'softmax': softmax,
+}
+
+DENSE_LOSSES = ['binary_crossentropy', 'categorical_crossentropy', 'sparse_categorical_crossentropy',
+                'mean_squared_error', 'mse', 'mean_absolute_error', 'mae']
+
+
+def export_dense_weights(model, path: str, loss: str):
+    arrays = {}
+    activations = []
+    for i in range(len(model.layers)):
+        layer = model.layers[i]
+        weights = layer.get_weights()
+        activation = layer.get_config().get('activation')
+        if len(weights) != 2 or activation not in DENSE_ACTIVATIONS:
+            return False
+        arrays['kernel_' + str(i)] = weights[0]
+        arrays['bias_' + str(i)] = weights[1]
+        activations.append(activation)
+
+    np.savez(path, activations=np.array(activations), loss=np.array(loss), **arrays)
+    return True
+
+
+def dense_forward(weights, x):
+    output = np.asarray(x, dtype=np.float32)
+    activations = weights['activations']
+    for i in range(len(activations)):
+        output = DENSE_ACTIVATIONS[str(activations[i])](output @ weights['kernel_' + str(i)] + weights['bias_' + str(i)])
+    return output
+
+
+def evaluate_dense_weights(path: str, x, y):
+    with np.load(path) as weights:
+        loss_name = str(weights['loss'])
+        if loss_name not in DENSE_LOSSES:
+            return None
+        output = dense_forward(weights, x)
+
+    epsilon = 1e-7
+    y = np.asarray(y, dtype=np.float32)
+    if y.ndim == 1:
+        y = y.reshape(-1, 1)
+
+    if loss_name == 'binary_crossentropy':
+        if y.shape != output.shape:
+            raise ValueError("Labels and outputs must have the same shape")
+        p = np.clip(output, epsilon, 1 - epsilon)
+        loss = np.mean(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p), axis=-1))
+    elif loss_name == 'categorical_crossentropy':
+        p = np.clip(output / np.sum(output, axis=-1, keepdims=True), epsilon, 1 - epsilon)
+        loss = np.mean(-np.sum(y * np.log(p), axis=-1))
+    elif loss_name == 'sparse_categorical_crossentropy':
+        p = np.clip(output / np.sum(output, axis=-1, keepdims=True), epsilon, 1 - epsilon)
+        loss = np.mean(-np.log(p[np.arange(p.shape[0]), y[:, 0].astype(int)]))
+    elif loss_name in ('mean_squared_error', 'mse'):
+        loss = np.mean(np.mean(np.square(output - y), axis=-1))
+    else:
+        loss = np.mean(np.mean(np.abs(output - y), axis=-1))
+
+    if output.shape[-1] == 1:
+        accuracy = np.mean((output > 0.5) == y)
+    elif y.shape[-1] == 1:
+        accuracy = np.mean(np.argmax(output, axis=-1) == y[:, 0])
+    else:
+        accuracy = np.mean(np.argmax(output, axis=-1) == np.argmax(y, axis=-1))
+
+    return float(loss), float(accuracy)
+
+
+def get_summary(db: Session, training_id: int):
     training = training_crud.find_by_id(db, training_id)
     if training is None:
         return None
 
-    model = keras.models.load_model(training.path)
-    text = get_model_summary(model)
+    if training.summary is None:
+        if not is_finished(training):
+            return NOT_FINISHED
+
+        from tensorflow.python import keras
+
+        model = keras.models.load_model(training.path)
+        set_model_metadata(training, model)
+        training_crud.save(db, training)
+
+    text = training.summary
 
     cont = 0
     for x in text:
         if x == '\n':
             cont += 1
 
-    return {"text": text, "n_jumps": cont}
+    return {"text": text, "n_jumps": cont,
+            "trainable_params": training.trainable_params,
+            "non_trainable_params": training.non_trainable_params}
+
+
+def set_model_metadata(training: models.Training, model):
+    training.summary = get_model_summary(model)
+    training.trainable_params = int(sum(np.prod(w.shape) for w in model.trainable_weights))
+    training.non_trainable_params = int(sum(np.prod(w.shape) for w in model.non_trainable_weights))
 
 def get_model_summary(model):
     stream = io.StringIO()
@@ -374,6 +1120,7 @@ def get_all_csvs(db: Session, training_id: int) -> list[models.CSV]:
 
 
 def train_test(dataframe, stimuli, testing):
+    from sklearn.model_selection import train_test_split
 
     dfs_one_stimulus = []
 
@@ -0,0 +1,56 @@
+import configparser
+
+import pytest
+
+from app.config import security
+from app.models import models
+
+
+@pytest.fixture
+def researcher_token(make_db, monkeypatch):
+    config = configparser.ConfigParser()
+    config.read_string("[SECURITY]\nsecret_key = test-secret\nalgorithm = HS256\naccess_token_expire_minute = 30\n")
+    monkeypatch.setattr(security, "config", config)
+    security.validated_tokens.clear()
+    engine, db = make_db()
+    researcher = models.Researcher(name="n", surname="s", email="r@example.com", user="researcher", password="x")
+    db.add(researcher)
+    db.commit()
+    yield engine, db, researcher.id, security.create_access_token(researcher)
+    security.validated_tokens.clear()
+
+
+def test_repeated_requests_look_up_the_researcher_once(researcher_token, query_counter):
+    engine, db, researcher_id, token = researcher_token
+
+    with query_counter(engine) as queries:
+        for _ in range(10):
+            assert security.get_current_researcher(token, db)
+
+    assert len(queries) == 1
+
+
+def test_invalidate_researcher_forces_a_new_lookup(researcher_token, query_counter):
+    engine, db, researcher_id, token = researcher_token
+    security.get_current_researcher(token, db)
+
+    security.invalidate_researcher(researcher_id)
+    db.query(models.Researcher).delete()
+    db.commit()
+
+    with query_counter(engine) as queries:
+        assert not security.get_current_researcher(token, db)
+    assert len(queries) == 1
+
+
+def test_auth_overhead_per_request(researcher_token, timer):
+    engine, db, researcher_id, token = researcher_token
+
+    def uncached():
+        security.validated_tokens.clear()
+        security.get_current_researcher(token, db)
+
+    uncached_time = timer(lambda: [uncached() for _ in range(200)], repeat=3) / 200
+    cached_time = timer(lambda: [security.get_current_researcher(token, db) for _ in range(200)], repeat=3) / 200
+    print("\nget_current_researcher: %.1f us with a researcher lookup, %.1f us cached"
+          % (uncached_time * 1e6, cached_time * 1e6))
@@ -0,0 +1,42 @@
+import configparser
+
+import pytest
+
+from app.config import crypto
+from app.models import models
+from app.services import csv as csv_service
+
+
+@pytest.fixture(autouse=True)
+def index_key():
+    crypto.blind_index_key = b"test-key"
+    yield
+    crypto.blind_index_key = None
+
+
+def test_prefixes_start_at_the_minimum_length():
+    prefixes = crypto.blind_index_prefixes("Ana Lopez")
+
+    assert crypto.blind_index_prefix("ana") in prefixes
+    assert crypto.blind_index_prefix("lop") in prefixes
+    assert crypto.blind_index_prefix("an") not in prefixes
+    assert crypto.blind_index_prefix("l") not in prefixes
+
+
+def test_short_subject_prefix_is_rejected(make_db):
+    engine, db = make_db()
+    db.add(models.Experiment(name="e", description="d", researcher_creator_id=1, epoch_start=-0.5, epoch_end=1.0))
+    db.commit()
+
+    assert csv_service.get_all_csv_experiment(db, 1, subject_prefix=" a ") == csv_service.PREFIX_TOO_SHORT
+    assert csv_service.get_all_csv_experiment(db, 1, subject_prefix="ana")[0] == []
+
+
+def test_missing_blind_index_key_fails(monkeypatch):
+    config = configparser.ConfigParser()
+    config.read_string("[SECURITY]\nkey = fernet-key\n")
+    monkeypatch.setattr(crypto, "config", config)
+    crypto.blind_index_key = None
+
+    with pytest.raises(RuntimeError):
+        crypto.blind_index("ana")
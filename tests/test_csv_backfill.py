@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from app.models import models
+from app.services import csv as csv_service
+
+
+def test_backfill_timestamps_parses_the_recording_date(make_db):
+    engine, db = make_db()
+    db.add_all([models.CSV(name="legacy", path="csvs/record_17-10-2026-09-30-15.csv", date="17-10-2026-09-30-15"),
+                models.CSV(name="broken", path="csvs/broken.csv", date="not a date"),
+                models.CSV(name="new", path="csvs/new.csv", date="x", timestamp=datetime(2026, 1, 1))])
+    db.commit()
+
+    assert csv_service.backfill_timestamps(db) == 1
+
+    timestamps = {x.name: x.timestamp for x in db.query(models.CSV).all()}
+    assert timestamps == {"legacy": datetime(2026, 10, 17, 9, 30, 15), "broken": None, "new": datetime(2026, 1, 1)}
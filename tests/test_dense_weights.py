@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from tensorflow.python.keras import Sequential
+from tensorflow.python.keras.layers import Dense
+
+from app.services import training as training_service
+
+CASES = [
+    ('mse', 1, 'sigmoid'),
+    ('mse', 3, 'softmax'),
+    ('mae', 3, 'softmax'),
+    ('binary_crossentropy', 1, 'sigmoid'),
+    ('binary_crossentropy', 3, 'sigmoid'),
+    ('categorical_crossentropy', 3, 'softmax'),
+    ('sparse_categorical_crossentropy', 3, 'softmax'),
+]
+
+
+def build_model(loss: str, units: int, activation: str, features: int = 8):
+    tf.random.set_seed(0)
+    model = Sequential()
+    model.add(Dense(16, activation='relu', input_shape=(features,)))
+    model.add(Dense(units, activation=activation))
+    model.compile(loss=loss, optimizer='adam', metrics=['accuracy'])
+    return model
+
+
+def build_data(loss: str, units: int, rows: int = 200, features: int = 8):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(rows, features)).astype(np.float32)
+    y = rng.integers(0, max(units, 2), size=rows)
+    if loss == 'categorical_crossentropy' or (loss == 'binary_crossentropy' and units > 1):
+        y = np.eye(units)[y]
+    return x, y
+
+
+@pytest.mark.parametrize("loss,units,activation", CASES)
+def test_dense_weights_match_keras(tmp_path, loss, units, activation):
+    model = build_model(loss, units, activation)
+    x, y = build_data(loss, units)
+    path = os.path.join(tmp_path, "model.npz")
+    assert training_service.export_dense_weights(model, path, loss)
+
+    keras_loss, keras_accuracy = model.evaluate(x=x, y=y, verbose=0)
+    loss_value, accuracy = training_service.evaluate_dense_weights(path, x, y)
+
+    assert loss_value == pytest.approx(keras_loss, rel=1e-4, abs=1e-5)
+    assert accuracy == pytest.approx(keras_accuracy, abs=1e-6)
+
+
+def test_dense_weights_latency(tmp_path, timer):
+    model = build_model('sparse_categorical_crossentropy', 3, 'softmax')
+    x, y = build_data('sparse_categorical_crossentropy', 3, rows=5000)
+    path = os.path.join(tmp_path, "model.npz")
+    training_service.export_dense_weights(model, path, 'sparse_categorical_crossentropy')
+
+    keras_time = timer(lambda: model.evaluate(x=x, y=y, verbose=0))
+    numpy_time = timer(lambda: training_service.evaluate_dense_weights(path, x, y))
+    print("\nKeras evaluate: %.2f ms, NumPy evaluate: %.2f ms" % (keras_time * 1000, numpy_time * 1000))
+
+
+def test_dense_weights_reject_what_keras_rejects(tmp_path):
+    model = build_model('binary_crossentropy', 3, 'sigmoid')
+    x, y = build_data('binary_crossentropy', 1)
+    path = os.path.join(tmp_path, "model.npz")
+    training_service.export_dense_weights(model, path, 'binary_crossentropy')
+
+    with pytest.raises(ValueError):
+        model.evaluate(x=x, y=y, verbose=0)
+    with pytest.raises(ValueError):
+        training_service.evaluate_dense_weights(path, x, y)
@@ -0,0 +1,32 @@
+from joblib import cpu_count
+from sklearn.datasets import make_classification
+from sklearn.model_selection import train_test_split
+
+from app.schemas.training import RandomForest, GradientBoosting
+from app.services import training as training_service
+
+ALGORITHMS = [
+    ("RandomForest", RandomForest(n_estimators=50, n_jobs=1)),
+    ("RandomForest", RandomForest(n_estimators=50, n_jobs=-1)),
+    ("GradientBoosting", GradientBoosting(max_iter=100)),
+]
+
+
+def test_ensemble_fit_and_predict_time(timer):
+    print("\n" + str(cpu_count()) + " CPUs available", end="")
+    x, y = make_classification(n_samples=5000, n_features=20, n_informative=10, random_state=0)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=0)
+
+    print("\n%-68s%12s%14s%10s" % ("", "fit (ms)", "predict (ms)", "accuracy"))
+    for algorithm, params in ALGORITHMS:
+        clf = training_service.get_classifier(algorithm, params.dict())
+
+        fit_time = timer(lambda: clf.fit(x_train, y_train), repeat=1)
+        predict_time = timer(lambda: clf.predict(x_test), repeat=3)
+        accuracy = clf.score(x_test, y_test)
+        label = training_service.get_classifier_description(algorithm, params.dict())
+        if "n_jobs" in params.dict():
+            label += " n_jobs=" + str(params.n_jobs)
+        print("%-68s%12.1f%14.1f%10.3f" % (label, fit_time * 1000, predict_time * 1000, accuracy))
+
+        assert accuracy > 0.8
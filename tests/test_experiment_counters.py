@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import models
+from app.models.migration import migrate
+from app.repositories import experiment as experiment_crud
+from app.services import csv as csv_service
+
+
+def test_counters_are_recomputed_for_a_legacy_schema():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE experiment (id INTEGER PRIMARY KEY, name VARCHAR(255), "
+                                   "description VARCHAR(255), researcher_creator_id INTEGER, "
+                                   "epoch_start FLOAT, epoch_end FLOAT)")
+        connection.exec_driver_sql("INSERT INTO experiment (id, name) VALUES (1, 'legacy'), (2, 'empty')")
+    models.Base.metadata.create_all(bind=engine)
+
+    added = migrate(engine)
+    assert {"experiment.csv_count", "experiment.training_count", "experiment.last_modified"} <= set(added)
+
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.CSV(name="a", path="a.csv", date="01-02-2026-10-00-00", duraction=30, experiment_id=1),
+                models.CSV(name="b", path="b.csv", date="03-02-2026-10-00-00", duraction=20, experiment_id=1),
+                models.Training(name="t", path="t.joblib", experiment_id=1, timestamp=datetime(2026, 3, 1))])
+    db.commit()
+
+    csv_service.backfill_timestamps(db)
+    assert experiment_crud.recompute_counters(db) == 2
+
+    legacy, empty = db.query(models.Experiment).order_by(models.Experiment.id).all()
+    assert (legacy.csv_count, legacy.total_duration, legacy.training_count) == (2, 50, 1)
+    assert legacy.last_modified == datetime(2026, 3, 1)
+    assert (empty.csv_count, empty.total_duration, empty.training_count, empty.last_modified) == (0, 0, 0, None)
+
+
+def test_last_modified_keeps_the_latest_activity(make_db):
+    engine, db = make_db()
+    db.add(models.Experiment(name="e", last_modified=datetime(2026, 1, 1)))
+    db.add(models.CSV(name="a", path="a.csv", experiment_id=1, timestamp=datetime(2026, 5, 1)))
+    db.add(models.Training(name="t", path="t.joblib", experiment_id=1, timestamp=datetime(2026, 4, 1)))
+    db.commit()
+
+    experiment_crud.recompute_counters(db)
+
+    assert db.query(models.Experiment).one().last_modified == datetime(2026, 5, 1)
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from tensorflow.python.keras import Sequential
+from tensorflow.python.keras.layers import Dense
+
+from app.models import models
+from app.schemas.training import DeepLearningPost
+from app.services import progress as progress_service
+from app.services import training as training_service
+
+
+def setup(make_db, tmp_path, job_id):
+    engine, db = make_db()
+    db.add(models.Experiment(name="e", description="d", researcher_creator_id=1, epoch_start=-0.5, epoch_end=1.0))
+    db.commit()
+
+    training_post = DeepLearningPost(csvs=[1], name="t", training_data=80, testing_data=20, exp_id=1,
+                                     optimizer="adam", learning_rate=0.01, type="default", layers=[],
+                                     loss="sparse_categorical_crossentropy", epochs=2, checkpoint_every=1,
+                                     job_id=job_id)
+    db_training = models.Training(name="t", experiment_id=1, type="Deep Learning", description="d",
+                                  path=str(tmp_path / "model.h5"), checkpoint=str(tmp_path / "model_checkpoint.h5"),
+                                  status="running", epoch=0, validation="Training in progress")
+    training_service.save_training(db, db_training)
+
+    model = Sequential()
+    model.add(Dense(2, activation="softmax", input_shape=(4,)))
+    model.compile(loss=training_post.loss, optimizer="adam", metrics=["accuracy"])
+    return db, db_training, model, training_post
+
+
+def data(labels):
+    x = np.random.default_rng(0).normal(size=(len(labels), 4)).astype(np.float32)
+    y = np.array(labels, dtype=np.float32)
+    return {"x": x, "y": y}, {"x": x, "y": y}
+
+
+def test_keras_errors_mark_the_training_failed(make_db, tmp_path):
+    db, db_training, model, training_post = setup(make_db, tmp_path, "job-deep-error")
+
+    returned = training_service.fit_deep(db, db_training, model, training_post, data([1, 2] * 10), 0, [])
+
+    assert type(returned) == str
+    assert db.query(models.Training).one().status == "failed"
+    events, finished = progress_service.read("job-deep-error", 0)
+    assert finished and events[-1][1]["status"] == "error"
+
+
+def test_finished_training_removes_its_checkpoint(make_db, tmp_path):
+    db, db_training, model, training_post = setup(make_db, tmp_path, None)
+
+    returned = training_service.fit_deep(db, db_training, model, training_post, data([0, 1] * 10), 0, [])
+
+    assert returned is True
+    training = db.query(models.Training).one()
+    assert training.status == "finished" and training.checkpoint is None
+    assert os.path.exists(training.path)
+    assert not os.path.exists(str(tmp_path / "model_checkpoint.h5"))
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import training as training_service
+
+STIMULI = [SimpleNamespace(name="1"), SimpleNamespace(name="2")]
+
+
+def write_csv(path, rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"a": np.arange(rows, dtype=float) + seed * 1000, "b": rng.normal(size=rows)})
+    df["Stimulus"] = rng.choice([1.0, 2.0], size=rows)
+    df.to_csv(path, index=False)
+    return SimpleNamespace(path=str(path)), df
+
+
+def collect(csvs, chunk_size, part):
+    parts = list(training_service.iter_chunks(csvs, chunk_size, STIMULI, 20, part))
+    return pd.concat([x for x, _ in parts], ignore_index=True)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 50, 1000])
+def test_iter_chunks_matches_train_test_per_csv(tmp_path, chunk_size):
+    csv, df = write_csv(tmp_path / "a.csv", 230, 0)
+
+    X_train, X_test, _, _ = training_service.train_test(df, STIMULI, 20)
+
+    assert sorted(collect([csv], chunk_size, 'train')["a"]) == sorted(X_train["a"])
+    assert sorted(collect([csv], chunk_size, 'test')["a"]) == sorted(X_test["a"])
+
+
+def test_iter_chunks_holds_out_trailing_rows_of_each_csv(tmp_path):
+    first, df_first = write_csv(tmp_path / "a.csv", 120, 1)
+    second, df_second = write_csv(tmp_path / "b.csv", 80, 2)
+
+    train = set(collect([first, second], 16, 'train')["a"])
+    test = set(collect([first, second], 16, 'test')["a"])
+
+    assert train.isdisjoint(test)
+    for df in (df_first, df_second):
+        for value in (1.0, 2.0):
+            rows = df.loc[df["Stimulus"] == value, "a"].tolist()
+            n_test = len([x for x in rows if x in test])
+            assert rows[len(rows) - n_test:] == [x for x in rows if x in test]
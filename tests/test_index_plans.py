@@ -0,0 +1,52 @@
+from app.models import models
+from app.models.migration import create_missing_indexes
+
+ROWS = 50000
+KEYS = 5000
+
+
+def lookups(db):
+    return {
+        "ix_training_experiment_id": db.query(models.Training).filter(models.Training.experiment_id == 42),
+        "ix_preproccessing_csv_id": db.query(models.Preproccessing).filter(models.Preproccessing.csv_id == 42),
+        "ix_feature_extraction_csv_id": db.query(models.FeatureExtraction).filter(models.FeatureExtraction.csv_id == 42),
+        "ix_mental_condition_subject_id": db.query(models.MentalCondition).filter(models.MentalCondition.subject_id == 42),
+    }
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(models.Training.__table__.insert(),
+                           [{"name": "t", "experiment_id": i % KEYS} for i in range(ROWS)])
+        connection.execute(models.Preproccessing.__table__.insert(),
+                           [{"preproccessing": "p", "position": 0, "csv_id": i % KEYS} for i in range(ROWS)])
+        connection.execute(models.FeatureExtraction.__table__.insert(),
+                           [{"feature": "Mean", "csv_id": i % KEYS} for i in range(ROWS)])
+        connection.execute(models.MentalCondition.__table__.insert(),
+                           [{"condition": "c", "subject_id": i % KEYS} for i in range(ROWS)])
+
+
+def plan(engine, query) -> str:
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return " ".join(x[-1] for x in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+
+
+def test_hot_lookups_use_the_new_indexes(make_db, timer):
+    engine, db = make_db()
+    queries = lookups(db)
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in queries:
+                index.drop(bind=engine)
+    seed(engine)
+
+    before = {name: (plan(engine, q), timer(q.all)) for name, q in queries.items()}
+    create_missing_indexes(engine)
+    after = {name: (plan(engine, q), timer(q.all)) for name, q in queries.items()}
+
+    for name in before:
+        print("\n%s: %.3f ms -> %.3f ms\n  before: %s\n  after:  %s"
+              % (name, before[name][1] * 1000, after[name][1] * 1000, before[name][0], after[name][0]))
+        assert name not in before[name][0]
+        assert name in after[name][0]
@@ -0,0 +1,28 @@
+import numpy as np
+from sklearn.datasets import make_classification
+
+from app.schemas.training import KNN
+from app.services import training as training_service
+
+SIZES = [1000, 10000, 50000]
+INDEXES = ['brute', 'ball_tree', 'kd_tree']
+
+
+def test_knn_query_latency_by_index(timer):
+    print("\n%-12s" % "query (ms)" + "".join("%12s" % ("n=" + str(n)) for n in SIZES))
+    results = {}
+    for index in INDEXES:
+        row = "%-12s" % index
+        for n in SIZES:
+            x, y = make_classification(n_samples=n + 500, n_features=8, n_informative=6, random_state=0)
+            clf = training_service.get_classifier('KNN', KNN(n_neighbors=5, index=index, n_jobs=1).dict())
+            clf.fit(x[:n], y[:n])
+
+            query_time = timer(lambda: clf.predict(x[n:]), repeat=3)
+            results[index, n] = clf.predict(x[n:])
+            row += "%12.1f" % (query_time * 1000)
+        print(row)
+
+    for n in SIZES:
+        assert np.array_equal(results['brute', n], results['ball_tree', n])
+        assert np.array_equal(results['brute', n], results['kd_tree', n])
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.config import crypto
+from app.controllers.page import page_response
+from app.models import models
+from app.schemas.csv import CSVResponse
+from app.schemas.experiment import ExperimentResponse, ExperimentsListResponse
+from app.schemas.researcher import ResearcherResponse
+from app.schemas.subject import SubjectResponse
+from app.schemas.training import TrainingListResponse
+from app.services import csv as csv_service
+from app.services import experiment as experiment_service
+from app.services import researcher as researcher_service
+from app.services import subject as subject_service
+from app.services import training as training_service
+
+
+@pytest.fixture(autouse=True)
+def fernet_key():
+    crypto.fernet = Fernet(Fernet.generate_key())
+    yield
+    crypto.fernet = None
+
+
+def seed(db, n: int):
+    researchers = [models.Researcher(name="r" + str(i), surname="s", email="r" + str(i) + "@lab", user="r" + str(i),
+                                     password="x") for i in range(n)]
+    subjects = [models.Subject(name="s" + str(i), surname="s", gender="F", age=30,
+                               mental_conditions=[models.MentalCondition(condition="a"),
+                                                  models.MentalCondition(condition="b")]) for i in range(n)]
+
+    for i in range(n):
+        experiment = models.Experiment(name="e" + str(i), description="d", researcher_creator_id=1,
+                                       epoch_start=-0.5, epoch_end=1.0)
+        experiment.researchers.append(researchers[i])
+        experiment.subjects.append(subjects[i])
+        experiment.stimuli = [models.Stimulus(name="1", description="a"), models.Stimulus(name="2", description="b")]
+        experiment.device = models.EEGHeadset(name="h", sample_rate=256, channels_count=2,
+                                              channels=[models.Channel(channel=models.NameChannel.Fp1, position=1),
+                                                        models.Channel(channel=models.NameChannel.Fp2, position=2)])
+        for j in range(n):
+            path = "csvs/" + str(i) + "_" + str(j) + ".csv"
+            csv = models.CSV(name="c", path=path, type="original", subject_name=crypto.encrypt("s s"),
+                             date=path, timestamp=datetime.now(), duraction=10, epochs="e", events=1,
+                             preproccessing_list=[models.Preproccessing(position=1, preproccessing="p", description="d")],
+                             feature=models.FeatureExtraction(feature="Mean"))
+            experiment.csvs.append(csv)
+        first = experiment.csvs[0]
+        for j in range(n):
+            experiment.trainings.append(models.Training(name="t", description="d", validation="v", type="Machine Learning",
+                                                        feature="Mean", path="t" + str(i) + "_" + str(j), csvs=[first]))
+        db.add(experiment)
+
+    db.add(models.Researcher(name="outside", surname="s", email="o@lab", user="o", password="x"))
+    db.add(models.Subject(name="outside", surname="s", gender="M", age=40,
+                          mental_conditions=[models.MentalCondition(condition="c")]))
+    db.commit()
+    db.expunge_all()
+
+
+def list_experiments(db):
+    items, next_cursor, total = experiment_service.get_all_experiments(db)
+    return page_response(items, ExperimentResponse, next_cursor, total)
+
+
+def list_experiments_summary(db):
+    items, next_cursor, total = experiment_service.get_all_experiments(db, detail=False)
+    return page_response(items, ExperimentsListResponse, next_cursor, total)
+
+
+def list_csvs(db):
+    items, next_cursor, total = csv_service.get_all_csv_experiment(db, 1)
+    return page_response(items, CSVResponse, next_cursor, total)
+
+
+def list_researchers(db):
+    items, next_cursor, total = researcher_service.get_all_researcher(db)
+    return page_response(items, ResearcherResponse, next_cursor, total)
+
+
+def list_researchers_not_experiment(db):
+    items, next_cursor, total = researcher_service.get_all_researcher_not_experiment(db, 1)
+    return page_response(items, ResearcherResponse, next_cursor, total)
+
+
+def list_subjects(db):
+    items, next_cursor, total = subject_service.get_all_subjects(db)
+    return page_response(items, SubjectResponse, next_cursor, total)
+
+
+def list_subjects_not_experiment(db):
+    items, next_cursor, total = subject_service.get_all_subjects_not_experiment(db, 1)
+    return page_response(items, SubjectResponse, next_cursor, total)
+
+
+def list_trainings_csv(db):
+    items, next_cursor, total = training_service.find_all_csv(db, 1)
+    return page_response(items, TrainingListResponse, next_cursor, total)
+
+
+def list_predictable(db):
+    return [TrainingListResponse.from_orm(x) for x in training_service.find_all_predictable(db, 2)]
+
+
+@pytest.mark.parametrize("endpoint", [list_experiments, list_experiments_summary, list_csvs, list_researchers,
+                                      list_researchers_not_experiment, list_subjects, list_subjects_not_experiment,
+                                      list_trainings_csv, list_predictable])
+def test_list_endpoints_run_a_constant_number_of_queries(make_db, query_counter, endpoint):
+    counts = []
+    for n in (2, 6):
+        engine, db = make_db()
+        seed(db, n)
+        with query_counter(engine) as queries:
+            endpoint(db)
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import bcrypt
+
+from app.models import models
+from app.services import researcher as researcher_service
+
+LOGINS = 12
+
+
+def test_login_storm_is_capped_and_keeps_the_loop_responsive(make_db, monkeypatch):
+    engine, db = make_db()
+    hashed = bcrypt.hashpw(b"secret", bcrypt.gensalt(10)).decode()
+    db.add(models.Researcher(name="n", surname="s", email="r@example.com", user="researcher", password=hashed))
+    db.commit()
+
+    checkpw = bcrypt.checkpw
+    lock = threading.Lock()
+    state = {"active": 0, "max_active": 0}
+
+    def counting_checkpw(password, hashed):
+        with lock:
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            return checkpw(password, hashed)
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    monkeypatch.setattr(bcrypt, "checkpw", counting_checkpw)
+
+    async def storm():
+        done = asyncio.Event()
+        lags = []
+
+        async def other_endpoint():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append((time.perf_counter() - start - 0.01, state["active"]))
+
+        ticker = asyncio.create_task(other_endpoint())
+        start = time.perf_counter()
+        results = await asyncio.gather(*[researcher_service.login(db, "researcher", "secret") for _ in range(LOGINS)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await ticker
+        return results, elapsed, lags
+
+    results, elapsed, lags = asyncio.run(storm())
+    print("\n%d logins in %.2f s (%.1f logins/s), other coroutine max lag %.1f ms"
+          % (LOGINS, elapsed, LOGINS / elapsed, max(x for x, _ in lags) * 1000))
+
+    assert all(x is not None for x in results)
+    assert state["max_active"] == researcher_service.hashing_executor._max_workers
+    assert len([x for x in lags if x[1] > 0]) > 0
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
+from app.models import models
+from app.models.migration import migrate
+from app.repositories import prediction as prediction_crud
+from app.services import training as training_service
+
+
+def seed(db):
+    db.add(models.Training(name="t", type="Machine Learning", path="t.joblib", experiment_id=1))
+    db.add(models.CSV(name="c", path="c.csv", experiment_id=1, version=1))
+    db.commit()
+
+
+def test_prediction_is_unique_per_training_and_csv(make_db):
+    engine, db = make_db()
+    seed(db)
+    db.add_all([models.Prediction(training_id=1, csv_id=1, text="a"), models.Prediction(training_id=1, csv_id=1, text="b")])
+
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+
+def test_concurrent_first_prediction_reuses_the_stored_row(make_db, monkeypatch):
+    engine, db = make_db()
+    seed(db)
+    find = prediction_crud.find_by_training_csv
+    lookups = []
+
+    def find_after_concurrent_insert(db, training_id, csv_id):
+        lookups.append(training_id)
+        if len(lookups) == 1:
+            db.add(models.Prediction(training_id=training_id, csv_id=csv_id, csv_version=1, text="first", n_jumps=1))
+            db.commit()
+            return None
+        return find(db, training_id, csv_id)
+
+    monkeypatch.setattr(prediction_crud, "find_by_training_csv", find_after_concurrent_insert)
+    monkeypatch.setattr(training_service, "is_finished", lambda training: True)
+    monkeypatch.setattr(training_service, "compute_prediction", lambda training, csv: {"text": "second", "n_jumps": 2})
+
+    assert training_service.predict(db, 1, 1) == {"text": "first", "n_jumps": 1}
+    assert db.query(models.Prediction).count() == 1
+
+
+def test_legacy_duplicates_are_removed_before_the_unique_index(make_db):
+    engine, db = make_db()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE prediction")
+        connection.exec_driver_sql("CREATE TABLE prediction (id INTEGER PRIMARY KEY, training_id INTEGER, "
+                                   "csv_id INTEGER, csv_version INTEGER, text TEXT, n_jumps INTEGER)")
+        connection.exec_driver_sql("INSERT INTO prediction (id, training_id, csv_id, text) "
+                                   "VALUES (1, 1, 1, 'a'), (2, 1, 1, 'b'), (3, 2, 1, 'c')")
+
+    assert prediction_crud.delete_duplicates(db) == 1
+    assert [x.text for x in db.query(models.Prediction).order_by(models.Prediction.id)] == ["a", "c"]
+
+    migrate(engine)
+    assert "uq_prediction_training_id_csv_id" in {i["name"] for i in inspect(engine).get_indexes("prediction")}
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO prediction (training_id, csv_id) VALUES (2, 1)")
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import time
+
+from app.config.cache import TTLCache
+from app.services import progress as progress_service
+
+
+async def collect(job_id: str, idle_timeout: float):
+    return [json.loads(x[len("data: "):]) async for x in progress_service.stream(job_id, idle_timeout)]
+
+
+def test_stream_replays_events_until_finished():
+    progress_service.publish("job-finished", {"epoch": 1})
+    progress_service.finish("job-finished", {"status": "finished"})
+
+    events = asyncio.run(collect("job-finished", 5))
+
+    assert events == [{"epoch": 1}, {"status": "finished"}]
+
+
+def test_stream_unknown_job_times_out_without_creating_a_channel():
+    events = asyncio.run(collect("job-unknown", 0.1))
+
+    assert events == [{"status": "timeout"}]
+    assert progress_service.channels.get("job-unknown") is None
+
+
+def test_channel_keeps_a_bounded_number_of_events():
+    for epoch in range(progress_service.MAX_EVENTS + 10):
+        progress_service.publish("job-long", {"epoch": epoch})
+
+    channel = progress_service.channels.get("job-long")
+    assert len(channel.events) == progress_service.MAX_EVENTS
+    assert channel.events[-1] == (progress_service.MAX_EVENTS + 10, {"epoch": progress_service.MAX_EVENTS + 9})
+
+
+def test_publishing_keeps_a_long_running_channel_alive(monkeypatch):
+    monkeypatch.setattr(progress_service, "channels", TTLCache(maxsize=256, ttl=0.2))
+    for epoch in range(1, 5):
+        progress_service.publish("job-slow", {"epoch": epoch})
+        time.sleep(0.1)
+    progress_service.finish("job-slow", {"status": "finished", "training_id": 1})
+
+    events = asyncio.run(collect("job-slow", 5))
+
+    assert events == [{"epoch": 1}, {"epoch": 2}, {"epoch": 3}, {"epoch": 4},
+                      {"status": "finished", "training_id": 1}]
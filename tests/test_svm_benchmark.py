@@ -0,0 +1,31 @@
+from sklearn.datasets import make_classification
+from sklearn.model_selection import train_test_split
+
+from app.schemas.training import SVM, LinearSVM, ApproximateSVM
+from app.services import training as training_service
+
+SIZES = [500, 2000, 8000]
+
+ALGORITHMS = [
+    ("SVM", SVM(kernel="rbf")),
+    ("LinearSVM", LinearSVM(c=1.0)),
+    ("ApproximateSVM", ApproximateSVM(approximation="nystroem", gamma=0.05)),
+    ("ApproximateSVM", ApproximateSVM(approximation="rbf_sampler", n_components=300, gamma=0.05)),
+]
+
+
+def test_svm_fit_time_against_n_samples(timer):
+    print("\n%-84s" % "fit time (ms) / accuracy" + "".join("%18s" % ("n=" + str(n)) for n in SIZES))
+    for algorithm, params in ALGORITHMS:
+        row = "%-84s" % training_service.get_classifier_description(algorithm, params.dict())
+        for n in SIZES:
+            x, y = make_classification(n_samples=n, n_features=20, n_informative=10, random_state=0)
+            x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=0)
+            clf = training_service.get_classifier(algorithm, params.dict())
+
+            fit_time = timer(lambda: clf.fit(x_train, y_train), repeat=1)
+            accuracy = clf.score(x_test, y_test)
+            row += "%18s" % ("%.1f / %.3f" % (fit_time * 1000, accuracy))
+
+            assert accuracy > 0.7
+        print(row)
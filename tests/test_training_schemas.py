@@ -0,0 +1,58 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.training import ApproximateSVM, KNN, RandomForest, PipelinePost, MachineLearningSearchPost, \
+    CrossValidationPost
+from app.services import training as training_service
+
+
+@pytest.mark.parametrize("approximation", ['nystroem', 'rbf_sampler'])
+def test_approximate_svm_uses_the_same_gamma_for_both_approximations(approximation):
+    params = ApproximateSVM(approximation=approximation).dict()
+
+    clf = training_service.get_classifier('ApproximateSVM', params)
+
+    assert clf.steps[0][1].gamma == 1.0
+
+
+def test_approximate_svm_rejects_unknown_approximation():
+    with pytest.raises(ValidationError):
+        ApproximateSVM(approximation='nystrom')
+
+
+def test_knn_rejects_unknown_index():
+    with pytest.raises(ValidationError):
+        KNN(n_neighbors=3, index='kdtree')
+
+
+def test_single_job_forces_inner_estimators_to_one_job():
+    clf = training_service.get_pipeline(
+        training_service.get_classifier('RandomForest', RandomForest(n_estimators=10).dict()), PipelinePost())
+
+    single = training_service.single_job(clf)
+
+    assert single.get_params()['randomforestclassifier__n_jobs'] == 1
+    assert clf.get_params()['randomforestclassifier__n_jobs'] == -1
+
+
+def test_search_rejects_unknown_strategy():
+    with pytest.raises(ValidationError):
+        MachineLearningSearchPost(csvs=[1], name="n", testing_data=20, training_data=80, exp_id=1,
+                                  algorithms=[{"n_neighbors": [3, 5]}], search='grids')
+
+
+@pytest.mark.parametrize("params", [{"type": "kfold"}, {"type": "group", "folds": 1}])
+def test_cross_validation_rejects_invalid_settings(params):
+    with pytest.raises(ValidationError):
+        CrossValidationPost(**params)
+
+
+@pytest.mark.parametrize("pca_components", [0, -0.5, 1.5])
+def test_pipeline_rejects_invalid_pca_components(pca_components):
+    with pytest.raises(ValidationError):
+        PipelinePost(pca_components=pca_components)
+
+
+@pytest.mark.parametrize("pca_components", [0.95, 1, 10])
+def test_pipeline_accepts_pca_components(pca_components):
+    assert PipelinePost(pca_components=pca_components).pca_components == pca_components